@@ -0,0 +1,259 @@
+import threading
+from datetime import date
+from functools import wraps
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from leavebot.analytics.roster import parse_dates
+
+
+def _locked(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class ReportingTree:
+    """
+    Reporting hierarchy over all stored employees (manager_id -> direct reports).
+    An Euler tour gives every employee an interval [tin, tout) of tour positions that
+    holds exactly their sub-tree, and per-employee facts (leave balances, probation end)
+    are kept in arrays in tour order, so sub-tree queries are array slices.
+
+    Updates are incremental: a fact-only change writes into the arrays in place;
+    a changed reporting line (or new employee / leave code) only marks the tour
+    for a rebuild on the next query.
+
+    Updates and queries hold self.lock (re-entrant), so one tree can be shared by
+    threads; hold it around several queries to answer them from the same version.
+    """
+
+    def __init__(self):
+        self.parent: Dict[str, Optional[str]] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.facts: Dict[str, Dict[str, Any]] = {}
+        self.version = 0  # context store version this tree reflects
+        self._dirty = True
+        self.tin: Dict[str, int] = {}
+        self.tout: Dict[str, int] = {}
+        self.order: List[str] = []
+        self.leave_codes: List[str] = []
+        self.code_index: Dict[str, int] = {}
+        self.balances = np.zeros((0, 0))
+        self.probation_end = np.zeros(0, dtype="datetime64[D]")
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_store(cls, store=None) -> "ReportingTree":
+        tree = cls()
+        tree.refresh(store)
+        return tree
+
+    @_locked
+    def refresh(self, store=None) -> int:
+        """Apply reporting rows written since self.version. Returns the number applied."""
+        from leavebot.core.context_store import ContextStore
+
+        store = store if store is not None else ContextStore()
+        version = store.version()
+        if version == self.version:
+            return 0
+        rows = store.reporting_since(self.version)
+        self.apply(rows)
+        self.version = version
+        return len(rows)
+
+    # ---- Incremental maintenance ----
+
+    @_locked
+    def apply(self, rows: Iterable[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]) -> None:
+        """Apply (emp_id, manager_id, facts) rows; facts None removes the employee."""
+        for emp_id, manager_id, facts in rows:
+            if facts is None:
+                self.remove(emp_id)
+            else:
+                self.upsert(emp_id, manager_id, facts)
+
+    @_locked
+    def upsert(self, emp_id, manager_id, facts: Dict[str, Any]) -> None:
+        emp_id = str(emp_id)
+        manager_id = str(manager_id) if manager_id not in (None, "", "0") else None
+        known = emp_id in self.parent
+        if not known or self.parent[emp_id] != manager_id:
+            self._unlink(emp_id)
+            self.parent[emp_id] = manager_id
+            if manager_id is not None:
+                self.children.setdefault(manager_id, []).append(emp_id)
+            self._dirty = True
+        self.facts[emp_id] = facts
+        if not self._dirty:
+            self._write_facts(emp_id)
+
+    @_locked
+    def remove(self, emp_id) -> None:
+        emp_id = str(emp_id)
+        if emp_id in self.parent:
+            self._unlink(emp_id)
+            del self.parent[emp_id]
+            self.facts.pop(emp_id, None)
+            self._dirty = True
+
+    def _unlink(self, emp_id: str) -> None:
+        old = self.parent.get(emp_id)
+        if old is not None and emp_id in self.children.get(old, ()):
+            self.children[old].remove(emp_id)
+
+    def _write_facts(self, emp_id: str) -> None:
+        pos = self.tin[emp_id]
+        facts = self.facts[emp_id]
+        balances = facts.get("balances") or {}
+        if any(code not in self.code_index for code in balances):
+            self._dirty = True  # New leave code: columns change, rebuild lazily
+            return
+        self.balances[pos] = 0
+        for code, value in balances.items():
+            self.balances[pos, self.code_index[code]] = value or 0
+        self.probation_end[pos] = parse_dates([facts.get("probation_end")])[0]
+
+    # ---- Euler tour ----
+
+    def _roots(self) -> List[str]:
+        """Employees whose manager is unknown (or themselves) start a tree."""
+        return sorted(e for e, m in self.parent.items() if m is None or m == e or m not in self.parent)
+
+    def _build(self) -> None:
+        self.tin, self.tout, self.order = {}, {}, []
+        for root in self._roots():
+            self._tour(root)
+        # Reporting cycles (bad ERP data) are unreachable from any root; cut them open
+        for emp_id in sorted(self.parent):
+            if emp_id not in self.tin:
+                self._tour(emp_id)
+
+        self.leave_codes = sorted({code for f in self.facts.values() for code in (f.get("balances") or {})})
+        self.code_index = {code: j for j, code in enumerate(self.leave_codes)}
+        self.balances = np.zeros((len(self.order), len(self.leave_codes)))
+        for pos, emp_id in enumerate(self.order):
+            for code, value in (self.facts[emp_id].get("balances") or {}).items():
+                self.balances[pos, self.code_index[code]] = value or 0
+        self.probation_end = parse_dates([self.facts[e].get("probation_end") for e in self.order])
+        self._dirty = False
+
+    def _tour(self, root: str) -> None:
+        # Iterative DFS; an employee reached twice (cycle) is not entered again
+        stack = [(root, False)]
+        while stack:
+            emp_id, done = stack.pop()
+            if done:
+                self.tout[emp_id] = len(self.order)
+                continue
+            if emp_id in self.tin:
+                continue
+            self.tin[emp_id] = len(self.order)
+            self.order.append(emp_id)
+            stack.append((emp_id, True))
+            for child in reversed(self.children.get(emp_id, [])):
+                if child in self.parent and child not in self.tin:
+                    stack.append((child, False))
+
+    @_locked
+    def _ensure(self) -> None:
+        if self._dirty:
+            self._build()
+
+    def _span(self, manager_id, subtree: bool) -> Tuple[np.ndarray, List[str]]:
+        """Tour positions and emp_ids of a manager's direct team or whole sub-tree (manager excluded)."""
+        self._ensure()
+        manager_id = str(manager_id)
+        if manager_id not in self.tin:
+            team = [c for c in self.children.get(manager_id, []) if c in self.tin]
+            if subtree:
+                # Manager without a context of their own: union of the reports' sub-trees
+                positions = np.concatenate([np.arange(self.tin[c], self.tout[c]) for c in team]) if team else np.zeros(0, np.int64)
+                return positions, [self.order[p] for p in positions]
+            return np.array([self.tin[c] for c in team], dtype=np.int64), team
+        if subtree:
+            positions = np.arange(self.tin[manager_id] + 1, self.tout[manager_id])
+            return positions, self.order[self.tin[manager_id] + 1:self.tout[manager_id]]
+        team = [c for c in self.children.get(manager_id, []) if c in self.tin]
+        return np.array([self.tin[c] for c in team], dtype=np.int64), team
+
+    # ---- Queries ----
+
+    @_locked
+    def team(self, manager_id, subtree: bool = False) -> List[str]:
+        return self._span(manager_id, subtree)[1]
+
+    @_locked
+    def zero_balance(self, manager_id, leave_code: str = "AL", subtree: bool = False) -> List[str]:
+        """Team members with no remaining balance of leave_code (or without that leave type)."""
+        positions, members = self._span(manager_id, subtree)
+        j = self.code_index.get(leave_code)
+        if j is None:
+            return list(members)
+        hits = self.balances[positions, j] <= 0
+        return [members[i] for i in np.flatnonzero(hits)]
+
+    @_locked
+    def on_probation(self, manager_id, subtree: bool = False, today: Optional[date] = None) -> List[str]:
+        positions, members = self._span(manager_id, subtree)
+        hits = self.probation_end[positions] > np.datetime64(today or date.today(), "D")
+        return [members[i] for i in np.flatnonzero(hits)]
+
+    @_locked
+    def rollup(self, manager_id, subtree: bool = False, today: Optional[date] = None) -> Dict[str, Any]:
+        """Head count, balance totals per leave code and probation count for a team."""
+        positions, members = self._span(manager_id, subtree)
+        totals = self.balances[positions].sum(axis=0) if len(positions) else np.zeros(len(self.leave_codes))
+        on_probation = int((self.probation_end[positions] > np.datetime64(today or date.today(), "D")).sum())
+        return {
+            "manager_id": str(manager_id),
+            "headcount": len(members),
+            "on_probation": on_probation,
+            "balances": {code: float(totals[j]) for j, code in enumerate(self.leave_codes) if totals[j]},
+        }
+
+    @_locked
+    def name(self, emp_id) -> str:
+        return (self.facts.get(str(emp_id)) or {}).get("name") or str(emp_id)
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+
+# Script usage:
+#   python -m leavebot.analytics.hierarchy 546 rollup
+#   python -m leavebot.analytics.hierarchy 546 zero-balance --code AL --subtree
+#   python -m leavebot.analytics.hierarchy 546 probation
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Team queries over the reporting hierarchy.")
+    parser.add_argument("manager_id")
+    parser.add_argument("query", choices=["team", "zero-balance", "probation", "rollup"])
+    parser.add_argument("--code", default="AL", help="zero-balance: leave code")
+    parser.add_argument("--subtree", action="store_true", help="Whole sub-tree instead of direct reports")
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    tree = ReportingTree.from_store()
+    tree._ensure()
+    build_ms = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    if args.query == "rollup":
+        result: Any = tree.rollup(args.manager_id, args.subtree)
+    elif args.query == "team":
+        result = tree.team(args.manager_id, args.subtree)
+    elif args.query == "zero-balance":
+        result = tree.zero_balance(args.manager_id, args.code, args.subtree)
+    else:
+        result = tree.on_probation(args.manager_id, args.subtree)
+    query_ms = (time.perf_counter() - t) * 1000
+    if isinstance(result, list):
+        result = [{"emp_id": e, "name": tree.name(e)} for e in result]
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"({len(tree)} employees; tree built in {build_ms:.0f} ms, query {query_ms:.2f} ms)")
@@ -0,0 +1,182 @@
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+from leavebot.analytics.roster import encode_categories
+
+BALANCE_FIELDS = ("balance", "eligible", "paid", "unpaid", "days_allowed", "max_days", "air_ticket_percent")
+GROUP_FIELDS = ("department", "leave_policy", "contract_type", "employee_type", "nationality", "sponsor")
+
+
+class LeaveLiability:
+    """
+    Leave balances of the whole workforce packed into (employee, leave code) arrays:
+    one float64 matrix per balance field, plus `present` (employee has that leave type)
+    and `air_ticket` masks. Employee group fields are int32 category codes, so grouped
+    totals are bincounts over matrix columns with no per-employee Python loops.
+    """
+
+    def __init__(
+        self,
+        emp_ids: np.ndarray,
+        leave_codes: List[str],
+        values: Dict[str, np.ndarray],
+        present: np.ndarray,
+        air_ticket: np.ndarray,
+        codes: Dict[str, np.ndarray],
+        categories: Dict[str, List[str]],
+    ):
+        self.emp_ids = emp_ids
+        self.leave_codes = leave_codes
+        self.code_index = {code: j for j, code in enumerate(leave_codes)}
+        self.values = values
+        self.present = present
+        self.air_ticket = air_ticket
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_contexts(cls, contexts: Iterable[Dict[str, Any]]) -> "LeaveLiability":
+        """Pack mapped contexts; packing is the only pass over individual employees."""
+        emp_ids: List[int] = []
+        groups: Dict[str, List[Optional[str]]] = {f: [] for f in GROUP_FIELDS}
+        code_index: Dict[str, int] = {}
+        rows: List[int] = []
+        cols: List[int] = []
+        flat: Dict[str, List[float]] = {f: [] for f in BALANCE_FIELDS}
+        tickets: List[bool] = []
+        for row, ctx in enumerate(contexts):
+            emp = ctx["employee"]
+            emp_ids.append(int(emp.get("emp_id") or -1))
+            for f in GROUP_FIELDS:
+                groups[f].append(emp.get(f))
+            for code, bal in ctx["leave_balances"].items():
+                rows.append(row)
+                cols.append(code_index.setdefault(code, len(code_index)))
+                for f in BALANCE_FIELDS:
+                    flat[f].append(bal.get(f) or 0)
+                tickets.append(bool(bal.get("air_ticket")))
+
+        shape = (len(emp_ids), len(code_index))
+        index = (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))
+        values = {}
+        for f in BALANCE_FIELDS:
+            values[f] = np.zeros(shape, dtype=np.float64)
+            values[f][index] = flat[f]
+        present = np.zeros(shape, dtype=bool)
+        present[index] = True
+        air_ticket = np.zeros(shape, dtype=bool)
+        air_ticket[index] = tickets
+        codes, categories = {}, {}
+        for f in GROUP_FIELDS:
+            codes[f], categories[f] = encode_categories(groups[f])
+        return cls(np.asarray(emp_ids, dtype=np.int64), list(code_index), values, present, air_ticket, codes, categories)
+
+    @classmethod
+    def from_store(cls, store=None) -> "LeaveLiability":
+        from leavebot.core.context_store import ContextStore
+
+        store = store if store is not None else ContextStore()
+        return cls.from_contexts(store.iter_contexts())
+
+    def __len__(self) -> int:
+        return len(self.emp_ids)
+
+    def column(self, leave_code: str, field: str = "balance") -> np.ndarray:
+        """One leave code's values for every employee (zeros where the employee lacks it)."""
+        j = self.code_index.get(leave_code)
+        return np.zeros(len(self)) if j is None else self.values[field][:, j]
+
+    def _grouped(self, weights: np.ndarray, counts: np.ndarray, by: Optional[str], value_name: str) -> List[Dict[str, Any]]:
+        if by is None:
+            return [{"group": "all", value_name: float(weights.sum()), "employees": int(counts.sum())}]
+        labels = self.categories[by]
+        totals = np.bincount(self.codes[by], weights=weights, minlength=len(labels))
+        heads = np.bincount(self.codes[by], weights=counts, minlength=len(labels))
+        order = np.argsort(-totals, kind="stable")
+        return [
+            {"group": labels[g] or "(none)", value_name: float(totals[g]), "employees": int(heads[g])}
+            for g in order if heads[g]
+        ]
+
+    def outstanding(self, leave_code: str = "AL", by: Optional[str] = "department", field: str = "balance") -> List[Dict[str, Any]]:
+        """Total outstanding days of one leave code per group (largest first)."""
+        values = np.clip(self.column(leave_code, field), 0, None)
+        return self._grouped(values, (values > 0).astype(np.float64), by, f"{field}_days")
+
+    def air_ticket_exposure(self, by: Optional[str] = "department") -> List[Dict[str, Any]]:
+        """
+        Air-ticket exposure per group: for every air-ticket leave, air_ticket_percent / 100
+        times the eligible days, summed over an employee's leave types.
+        """
+        exposure = np.where(self.air_ticket, self.values["air_ticket_percent"] / 100 * self.values["eligible"], 0.0)
+        per_employee = exposure.sum(axis=1)
+        return self._grouped(per_employee, (per_employee > 0).astype(np.float64), by, "exposure")
+
+    def over_max_days(self) -> List[Dict[str, Any]]:
+        """(employee, leave code) pairs whose balance exceeds a positive max_days cap."""
+        max_days = self.values["max_days"]
+        balance = self.values["balance"]
+        rows, cols = np.nonzero(self.present & (max_days > 0) & (balance > max_days))
+        return [
+            {
+                "emp_id": int(self.emp_ids[i]),
+                "code": self.leave_codes[j],
+                "balance": float(balance[i, j]),
+                "max_days": float(max_days[i, j]),
+                "excess": float(balance[i, j] - max_days[i, j]),
+            }
+            for i, j in zip(rows, cols)
+        ]
+
+    def code_summary(self) -> List[Dict[str, Any]]:
+        """Per leave code: employees holding it, total and mean balance, air-ticket holders."""
+        balance = np.where(self.present, self.values["balance"], 0.0)
+        holders = self.present.sum(axis=0)
+        totals = balance.sum(axis=0)
+        tickets = (self.present & self.air_ticket).sum(axis=0)
+        return [
+            {
+                "code": code,
+                "employees": int(holders[j]),
+                "total_balance": float(totals[j]),
+                "mean_balance": float(totals[j] / holders[j]) if holders[j] else 0.0,
+                "air_ticket_employees": int(tickets[j]),
+            }
+            for j, code in enumerate(self.leave_codes)
+        ]
+
+
+# Script usage:
+#   python -m leavebot.analytics.liability outstanding --code AL --by department
+#   python -m leavebot.analytics.liability air-ticket --by department
+#   python -m leavebot.analytics.liability over-max
+#   python -m leavebot.analytics.liability codes
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Company-wide leave liability from the context store.")
+    parser.add_argument("report", choices=["outstanding", "air-ticket", "over-max", "codes"])
+    parser.add_argument("--code", default="AL", help="outstanding: leave code")
+    parser.add_argument("--by", default="department", help=f"Group field ({', '.join(GROUP_FIELDS)}) or 'none'")
+    args = parser.parse_args()
+    by = None if args.by == "none" else args.by
+
+    t = time.perf_counter()
+    liability = LeaveLiability.from_store()
+    build_ms = (time.perf_counter() - t) * 1000
+    t = time.perf_counter()
+    if args.report == "outstanding":
+        rows = liability.outstanding(args.code, by)
+    elif args.report == "air-ticket":
+        rows = liability.air_ticket_exposure(by)
+    elif args.report == "over-max":
+        rows = liability.over_max_days()
+    else:
+        rows = liability.code_summary()
+    query_ms = (time.perf_counter() - t) * 1000
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+    print(f"({len(liability)} employees x {len(liability.leave_codes)} leave codes; "
+          f"packed in {build_ms:.0f} ms, report {query_ms:.2f} ms)")
@@ -0,0 +1,199 @@
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+DATE_FORMAT = "%d-%b-%Y"  # ERP date strings, e.g. 10-Mar-2021
+DATE_FIELDS = ("doj", "probation_end", "rp_expiry", "confirmed_date")
+CATEGORY_FIELDS = (
+    "department", "job_title", "nationality", "gender", "contract_type",
+    "employee_type", "leave_policy", "sponsor", "shift_name",
+)
+TENURE_BINS = (0, 1, 2, 5, 10, 20)  # lower edges in years; the last bin is open-ended
+
+
+def parse_dates(values: Sequence[Optional[str]], fmt: str = DATE_FORMAT) -> np.ndarray:
+    """
+    Parse date strings into a datetime64[D] array (NaT where missing or invalid).
+    Each distinct string is parsed once, so a roster costs as many strptime calls
+    as it has distinct dates.
+    """
+    parsed: Dict[Optional[str], np.datetime64] = {}
+    out = np.empty(len(values), dtype="datetime64[D]")
+    for i, value in enumerate(values):
+        day = parsed.get(value)
+        if day is None:
+            try:
+                day = np.datetime64(datetime.strptime(value.strip(), fmt).date(), "D")
+            except (AttributeError, ValueError):
+                day = np.datetime64("NaT", "D")
+            parsed[value] = day
+        out[i] = day
+    return out
+
+
+def encode_categories(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, List[str]]:
+    """Dictionary-encode strings: int32 codes into a sorted category list ("" for missing)."""
+    cleaned = [(v or "").strip() for v in values]
+    if not cleaned:
+        return np.zeros(0, dtype=np.int32), []
+    categories, codes = np.unique(np.array(cleaned, dtype=object), return_inverse=True)
+    return codes.astype(np.int32), [str(c) for c in categories]
+
+
+def _today(today: Optional[date]) -> np.datetime64:
+    return np.datetime64(today or date.today(), "D")
+
+
+class RosterColumns:
+    """
+    Column-oriented view of every mapped employee context: ERP date strings parsed
+    once into datetime64[D] arrays, categorical fields stored as int32 codes.
+    Roster-wide questions become vectorized masks over these columns.
+    """
+
+    def __init__(
+        self,
+        emp_ids: np.ndarray,
+        names: np.ndarray,
+        dates: Dict[str, np.ndarray],
+        codes: Dict[str, np.ndarray],
+        categories: Dict[str, List[str]],
+    ):
+        self.emp_ids = emp_ids
+        self.names = names
+        self.dates = dates
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_contexts(cls, contexts: Iterable[Dict[str, Any]]) -> "RosterColumns":
+        employees = [ctx["employee"] for ctx in contexts]
+        emp_ids = np.array([int(e.get("emp_id") or -1) for e in employees], dtype=np.int64)
+        names = np.array([e.get("name") or "" for e in employees], dtype=object)
+        dates = {f: parse_dates([e.get(f) for e in employees]) for f in DATE_FIELDS}
+        codes, categories = {}, {}
+        for f in CATEGORY_FIELDS:
+            codes[f], categories[f] = encode_categories([e.get(f) for e in employees])
+        return cls(emp_ids, names, dates, codes, categories)
+
+    @classmethod
+    def from_store(cls, store=None) -> "RosterColumns":
+        from leavebot.core.context_store import ContextStore
+
+        store = store if store is not None else ContextStore()
+        return cls.from_contexts(store.iter_contexts())
+
+    def __len__(self) -> int:
+        return len(self.emp_ids)
+
+    # ---- Filters (boolean masks over employees) ----
+
+    def category_mask(self, field: str, value: str) -> np.ndarray:
+        """Employees whose categorical field equals value (case-insensitive)."""
+        wanted = value.strip().lower()
+        matches = [i for i, c in enumerate(self.categories[field]) if c.lower() == wanted]
+        return np.isin(self.codes[field], matches)
+
+    def on_probation(self, today: Optional[date] = None) -> np.ndarray:
+        """Probation end date still in the future (same rule as EmployeeHelpers.is_on_probation)."""
+        return self.dates["probation_end"] > _today(today)
+
+    def rp_expiring(self, within_days: int = 30, today: Optional[date] = None, include_expired: bool = False) -> np.ndarray:
+        """Residence permit expiring within the next within_days days (optionally also already expired)."""
+        now = _today(today)
+        expiry = self.dates["rp_expiry"]
+        mask = expiry <= now + np.timedelta64(within_days, "D")
+        return mask if include_expired else mask & (expiry >= now)
+
+    # ---- Measures ----
+
+    def years_of_service(self, today: Optional[date] = None) -> np.ndarray:
+        """Whole years since joining ((today - doj).days // 365, like EmployeeHelpers); -1 if unknown."""
+        days = (_today(today) - self.dates["doj"]).astype("timedelta64[D]")
+        known = ~np.isnat(days)
+        years = np.full(len(self), -1, dtype=np.int64)
+        years[known] = days[known].astype(np.int64) // 365
+        return years
+
+    def tenure_distribution(
+        self,
+        by: Optional[str] = None,
+        bins: Sequence[int] = TENURE_BINS,
+        today: Optional[date] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
+        """
+        Head count per tenure band, optionally per category of `by`.
+        Returns {"bands": [...], "groups": [...], "counts": 2-D int array (groups x bands)}.
+        Employees with an unknown joining date are left out.
+        """
+        years = self.years_of_service(today)
+        keep = years >= 0
+        if mask is not None:
+            keep &= mask
+        edges = np.asarray(bins)
+        band = np.searchsorted(edges, years[keep], side="right") - 1
+        bands = [f"{lo}-{hi}" for lo, hi in zip(edges[:-1], edges[1:])] + [f"{edges[-1]}+"]
+        if by is None:
+            groups, group = ["all"], np.zeros(band.size, dtype=np.int64)
+        else:
+            groups, group = self.categories[by], self.codes[by][keep]
+        counts = np.zeros((len(groups), len(bands)), dtype=np.int64)
+        np.add.at(counts, (group, band), 1)
+        return {"bands": bands, "groups": groups, "counts": counts}
+
+    def rows(self, mask: np.ndarray, fields: Sequence[str] = ("department", "probation_end", "rp_expiry")) -> List[Dict[str, Any]]:
+        """Materialize the selected employees as dicts (for display or JSON output)."""
+        out = []
+        for i in np.flatnonzero(mask):
+            row = {"emp_id": int(self.emp_ids[i]), "name": self.names[i]}
+            for f in fields:
+                if f in self.dates:
+                    value = self.dates[f][i]
+                    row[f] = None if np.isnat(value) else str(value)
+                else:
+                    row[f] = self.categories[f][self.codes[f][i]]
+            out.append(row)
+        return out
+
+
+# Script usage:
+#   python -m leavebot.analytics.roster probation
+#   python -m leavebot.analytics.roster rp-expiring --days 30
+#   python -m leavebot.analytics.roster tenure --by department
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Roster-wide date queries over the context store.")
+    parser.add_argument("query", choices=["probation", "rp-expiring", "tenure"])
+    parser.add_argument("--days", type=int, default=30, help="rp-expiring: window in days")
+    parser.add_argument("--include-expired", action="store_true", help="rp-expiring: also list expired permits")
+    parser.add_argument("--by", choices=CATEGORY_FIELDS, help="tenure: group by this field")
+    parser.add_argument("--department", help="Only employees of this department")
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    roster = RosterColumns.from_store()
+    build_ms = (time.perf_counter() - t) * 1000
+    base = roster.category_mask("department", args.department) if args.department else np.ones(len(roster), bool)
+
+    t = time.perf_counter()
+    if args.query == "tenure":
+        result = roster.tenure_distribution(by=args.by, mask=base)
+        query_ms = (time.perf_counter() - t) * 1000
+        print(f"{'':<30}" + "".join(f"{b:>8}" for b in result["bands"]))
+        for name, row in zip(result["groups"], result["counts"]):
+            if row.sum():
+                print(f"{(name or '(none)')[:30]:<30}" + "".join(f"{n:>8}" for n in row))
+    else:
+        if args.query == "probation":
+            mask = roster.on_probation() & base
+        else:
+            mask = roster.rp_expiring(args.days, include_expired=args.include_expired) & base
+        query_ms = (time.perf_counter() - t) * 1000
+        for row in roster.rows(mask):
+            print(json.dumps(row, ensure_ascii=False))
+        print(f"{int(mask.sum())} of {len(roster)} employees")
+    print(f"(columns built in {build_ms:.0f} ms, query {query_ms:.2f} ms)")
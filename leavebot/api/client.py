@@ -1,7 +1,17 @@
 import os
+import time
+import random
 import requests
 import logging
+from contextlib import nullcontext
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
+from requests.adapters import HTTPAdapter
+
+from leavebot.api.response_cache import ResponseCache
+from leavebot.api.throttle import RequestThrottle
+from leavebot.core.metrics import METRICS, span
 
 # Auto-load .env if present
 try:
@@ -15,16 +25,35 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(mess
 
 API_BASE = os.getenv("ERP_API_BASE", "http://117.247.187.131:8085/api")
 TIMEOUT = 30  # seconds
+POOL_SIZE = int(os.getenv("ERP_POOL_SIZE", 10))  # keep-alive connections per host
+MAX_RETRIES = int(os.getenv("ERP_MAX_RETRIES", 2))
+BACKOFF_BASE = 0.5  # seconds; retry n waits a random time up to BACKOFF_BASE * 2**n
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 class ERPApiClient:
     """
     Client for interacting with the ERP API for employee and leave data.
     """
 
-    def __init__(self, token: Optional[str] = None, cgm_id: int = 1):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        cgm_id: int = 1,
+        pool_size: int = POOL_SIZE,
+        max_retries: int = MAX_RETRIES,
+        throttle: Optional[RequestThrottle] = None,
+        raise_errors: bool = False,
+        cache: Optional[ResponseCache] = None,
+    ):
         """
         :param token: Bearer token for API authorization (may be blank for dev/test)
         :param cgm_id: Company group/master ID, default is 1
+        :param pool_size: Pooled keep-alive connections, also the number of concurrent balance requests
+        :param max_retries: Retries for connection errors, timeouts and 429/5xx responses
+        :param throttle: Optional shared concurrency / requests-per-second limit
+        :param raise_errors: Raise on failed requests instead of logging and returning []
+        :param cache: Optional response cache with per-endpoint TTLs (None always hits the ERP)
         """
         self.token = token or os.getenv("API_BEARER_TOKEN")
         # DO NOT enforce non-empty token if API allows blank
@@ -33,31 +62,93 @@ class ERPApiClient:
             "Content-Type": "application/json; charset=UTF-8"
         }
         self.cgm_id = cgm_id
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.throttle = throttle
+        self.raise_errors = raise_errors
+        self.cache = cache
+        # One pooled Session reuses TCP connections across requests (and threads)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self.headers)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "ERPApiClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _request(self, method: str, url: str, params: Dict[str, Any]) -> Any:
+        """
+        Send one request, retrying transient failures with full-jitter exponential backoff.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.throttle or nullcontext():
+                    resp = self.session.request(method, url, params=params, timeout=TIMEOUT)
+                resp.raise_for_status()
+                return resp.json()
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                status = e.response.status_code if isinstance(e, requests.HTTPError) and e.response is not None else None
+                if attempt >= self.max_retries or (status is not None and status not in RETRY_STATUSES):
+                    raise
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+                METRICS.incr("erp_retries", status=status or type(e).__name__)
+                logging.warning(f"Retrying {url} in {delay:.2f}s after error: {e}")
+                time.sleep(delay)
+
+    def _cached_request(self, endpoint: str, emp_id: int, method: str, url: str, params: Dict[str, Any]) -> Any:
+        """
+        _request through the response cache. Keys include every request parameter,
+        since responses carry per-employee fields; empty responses are not cached.
+        ERP round trips (retries included) are timed as the erp.request stage.
+        """
+        if self.cache is None:
+            with span("erp.request", endpoint=endpoint):
+                return self._request(method, url, params)
+        data = self.cache.get(endpoint, params)
+        METRICS.incr("erp_cache_lookups", endpoint=endpoint, result="hit" if data is not None else "miss")
+        if data is None:
+            with span("erp.request", endpoint=endpoint):
+                data = self._request(method, url, params)
+            if data:
+                self.cache.put(endpoint, params, data, emp_id=emp_id)
+        return data
+
+    def invalidate(self, emp_id: Optional[int] = None, endpoint: Optional[str] = None) -> None:
+        """Forget cached responses, e.g. for one employee after leave was applied."""
+        if self.cache is not None:
+            self.cache.invalidate(endpoint=endpoint, emp_id=emp_id)
 
     def get_employee_details(self, emp_id: int) -> List[Dict[str, Any]]:
         url = f"{API_BASE}/EmployeeMasterApi/HrmGetEmployeeDetails/"
         params = {"strEmp_ID_N": emp_id}
         try:
-            resp = requests.post(url, headers=self.headers, params=params, timeout=TIMEOUT)
-            resp.raise_for_status()
-            data = resp.json()
+            data = self._cached_request("employee_details", emp_id, "POST", url, params)
             logging.debug(f"Employee details for {emp_id}: {data}")
             return data
         except Exception as e:
             logging.error(f"Failed to fetch employee details for {emp_id}: {e}")
+            if self.raise_errors:
+                raise
             return []
 
     def get_leave_types(self, emp_id: int) -> List[Dict[str, Any]]:
         url = f"{API_BASE}/LeaveApplicationApi/FillLeaveType"
         params = {"Emp_ID_N": emp_id, "Cgm_ID_N": self.cgm_id}
         try:
-            resp = requests.get(url, headers=self.headers, params=params, timeout=TIMEOUT)
-            resp.raise_for_status()
-            data = resp.json()
+            data = self._cached_request("leave_types", emp_id, "GET", url, params)
             logging.debug(f"Leave types for {emp_id}: {data}")
             return data
         except Exception as e:
             logging.error(f"Failed to fetch leave types for {emp_id}: {e}")
+            if self.raise_errors:
+                raise
             return []
 
     def get_leave_balance(self, emp_id: int, lpd_id: int, start: str = "2025-01-01", end: str = "2025-12-31") -> List[Dict[str, Any]]:
@@ -65,28 +156,33 @@ class ERPApiClient:
         str_sql = f"{emp_id},{lpd_id},'{start}','{end}',0,0,1,0"
         params = {"StrSql": str_sql}
         try:
-            resp = requests.post(url, headers=self.headers, params=params, timeout=TIMEOUT)
-            resp.raise_for_status()
-            data = resp.json()
+            data = self._cached_request("leave_balance", emp_id, "POST", url, params)
             logging.debug(f"Leave balance for emp_id={emp_id} lpd_id={lpd_id}: {data}")
             return data
         except Exception as e:
             logging.error(f"Failed to fetch leave balance for emp_id={emp_id}, lpd_id={lpd_id}: {e}")
+            if self.raise_errors:
+                raise
             return []
 
     def fetch_all_data(self, emp_id: int) -> Dict[str, Any]:
         """
         Fetches and returns all relevant data for an employee.
+        Employee details are fetched alongside the leave types, and the
+        per-leave-type balances are requested concurrently over the pooled session.
+        Each job runs in a copy of the caller's context, so its erp.request spans
+        land in the caller's trace.
         """
         result = {"employee": [], "leave_types": [], "leave_balances": {}}
-        result["employee"] = self.get_employee_details(emp_id)
-        result["leave_types"] = self.get_leave_types(emp_id)
-        leave_balances = {}
-        for lt in result["leave_types"]:
-            lpd_id = lt.get("Lpd_ID_N")
-            if lpd_id is not None:
-                leave_balances[lpd_id] = self.get_leave_balance(emp_id, lpd_id)
-        result["leave_balances"] = leave_balances
+        with span("erp.fetch_all"), ThreadPoolExecutor(max_workers=self.pool_size) as pool:
+            employee_future = pool.submit(copy_context().run, self.get_employee_details, emp_id)
+            result["leave_types"] = self.get_leave_types(emp_id)
+            lpd_ids = [lt.get("Lpd_ID_N") for lt in result["leave_types"] if lt.get("Lpd_ID_N") is not None]
+            # One context copy per job: a context cannot be entered by two threads at once
+            balances = [pool.submit(copy_context().run, self.get_leave_balance, emp_id, lpd_id) for lpd_id in lpd_ids]
+            # Same shape and order as the serial version: {lpd_id: rows}
+            result["leave_balances"] = {lpd_id: future.result() for lpd_id, future in zip(lpd_ids, balances)}
+            result["employee"] = employee_future.result()
         return result
 
 # For direct script usage/testing:
@@ -0,0 +1,228 @@
+import os
+import time
+import asyncio
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from leavebot.analytics.hierarchy import ReportingTree
+from leavebot.core.context_store import ContextStore
+from leavebot.core.embedding_backends import DEFAULT_BACKEND, EmbeddingBackend, get_backend
+from leavebot.core.intent_router import IntentRouter
+from leavebot.core.metrics import annotate, span
+from leavebot.core.retrieval import HybridRetriever
+from leavebot.domain.answers import get_answers
+from leavebot.domain.employee_helpers import EmployeeHelpers
+
+# Seconds a loaded employee context is reused before re-reading the store
+CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", 300))
+CONTEXT_CACHE_SIZE = int(os.getenv("CONTEXT_CACHE_SIZE", 10_000))
+# Worker threads for blocking work in async callers (embedding API calls, SQLite reads)
+ENGINE_THREADS = int(os.getenv("ENGINE_THREADS", 32))
+
+
+def build_router() -> IntentRouter:
+    """
+    Keyword intents. Each intent declares its trigger phrases; the router matches all
+    of them in one pass over the query. Ties go to the intent registered first.
+    Answers are rendered per employee at mapping time (leavebot/domain/answers.py).
+    """
+    router = IntentRouter()
+    router.register("leave_balance", ["leave balance"])
+    router.register("air_ticket", ["air ticket"])
+    router.register("manager", ["manager", "reporting"])
+    router.register("probation", ["probation"])
+    router.register("accommodation", ["accommodation"])
+    router.register("shift", ["shift"])
+    router.register("rp_number", ["rp number", "resident permit"])
+    router.register("department", ["department"])
+    router.register("joining_date", ["joining date", "doj"])
+    # Manager questions about their reports; the other intents matched in the same
+    # query (probation, leave balance) pick the team answer
+    router.register("team", ["my team", "my reports", "reportees", "my subordinates"], priority=1)
+    router.compile()
+    return router
+
+
+class AnswerEngine:
+    """
+    Answering logic shared by the Streamlit app and the HTTP service: keyword routing to
+    materialized answers, team queries, and doc knowledge search as the fallback.
+    One engine per process holds the doc index, the reporting tree and a TTL cache of
+    employee contexts; it is thread-safe, and answer_async runs the blocking parts
+    (embedding calls, SQLite reads) on a worker pool so an event loop never waits on them.
+    """
+
+    def __init__(
+        self,
+        store: Optional[ContextStore] = None,
+        backend_name: Optional[str] = None,
+        context_ttl: float = CONTEXT_CACHE_TTL,
+        context_cache_size: int = CONTEXT_CACHE_SIZE,
+        threads: int = ENGINE_THREADS,
+    ):
+        if store is None:
+            store = ContextStore()
+            store.seed_if_empty()  # fresh checkout: start from the shipped mapped_context.json
+        self.store = store
+        self.backend_name = backend_name or DEFAULT_BACKEND
+        self.context_ttl = context_ttl
+        self.context_cache_size = context_cache_size
+        self.router = build_router()
+        self._contexts: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._contexts_lock = threading.Lock()
+        self._index: Optional[Tuple[str, EmbeddingBackend, HybridRetriever]] = None
+        self._index_lock = threading.Lock()
+        self._tree = ReportingTree()
+        self._threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ---- Shared state ----
+
+    def load_context(self, emp_id) -> Optional[Dict[str, Any]]:
+        """Employee context from the in-memory cache, re-read when stale or the store changed."""
+        emp_id = str(emp_id)
+        version = self.store.version()
+        now = time.monotonic()
+        with self._contexts_lock:
+            hit = self._contexts.get(emp_id)
+            if hit is not None and hit[1] == version and now - hit[2] < self.context_ttl:
+                self._contexts.move_to_end(emp_id)
+                return hit[0]
+        ctx = self.store.get(emp_id)
+        if ctx is None:
+            return None
+        with self._contexts_lock:
+            self._contexts[emp_id] = (ctx, version, now)
+            self._contexts.move_to_end(emp_id)
+            while len(self._contexts) > self.context_cache_size:
+                self._contexts.popitem(last=False)
+        return ctx
+
+    def load_answers(self, emp_id) -> Optional[Dict[str, Any]]:
+        # Stored answers are used as-is when current; stale ones are re-rendered once per context
+        ctx = self.load_context(emp_id)
+        return get_answers(ctx) if ctx is not None else None
+
+    def load_index(self) -> Tuple[EmbeddingBackend, HybridRetriever]:
+        """
+        Embedding backend and retriever, reloaded when the backend's index version changes
+        (EMBEDDING_BACKEND picks the backend, RETRIEVAL_MODE the retrieval mode).
+        """
+        current = self._index
+        version = (current[1] if current else get_backend(self.backend_name)).index_version()
+        if current is None or current[0] != version:
+            with self._index_lock:
+                current = self._index
+                if current is None or current[0] != version:
+                    backend = get_backend(self.backend_name)
+                    current = self._index = (version, backend, HybridRetriever(backend.load_index()))
+        return current[1], current[2]
+
+    def load_reporting_tree(self) -> ReportingTree:
+        # One tree per engine, brought up to date with only the rows changed since its version
+        # (the tree locks its own updates and queries)
+        self._tree.refresh(self.store)
+        return self._tree
+
+    # ---- Answering ----
+
+    def team_answer(self, manager_id, matched: List[str], query: str) -> Dict[str, Any]:
+        tree = self.load_reporting_tree()
+        names = lambda ids: "\n".join(f"{tree.name(e)} ({e})" for e in ids) or "Nobody."
+        with tree.lock:  # every figure from the same version of the tree
+            if "probation" in matched:
+                return {"title": "**Your team members on probation:**", "text": names(tree.on_probation(manager_id))}
+            if "leave_balance" in matched or "zero" in query.lower():
+                return {"title": "**Your team members with no annual leave balance:**", "text": names(tree.zero_balance(manager_id, "AL"))}
+            rollup = tree.rollup(manager_id, subtree=True)
+            lines = [f"Direct reports: {len(tree.team(manager_id))}", f"Everyone under you: {rollup['headcount']}",
+                     f"On probation: {rollup['on_probation']}"]
+        lines += [f"{code} balance total: {total:g} days" for code, total in rollup["balances"].items()]
+        return {"title": "**Your team:**", "text": "\n".join(lines)}
+
+    def route(self, query: str) -> List[str]:
+        with span("routing"):
+            matched = [i.name for i in self.router.match_all(query)]
+        annotate(intent=matched[0] if matched else "doc_search", matched=matched)
+        return matched
+
+    def intent_answer(self, emp_id, matched: List[str], query: str) -> Optional[Dict[str, Any]]:
+        """Answer for the best matched intent (None if the employee is unknown)."""
+        with span("answer", intent=matched[0]):
+            if matched[0] == "team":
+                return self.team_answer(emp_id, matched, query)
+            answers = self.load_answers(emp_id)
+            return answers["answers"][matched[0]] if answers is not None else None
+
+    def search(self, query: str, top_k: int = 2, embedding_fn: Optional[Callable[[str], Any]] = None) -> List[Dict[str, Any]]:
+        """Doc knowledge search; stage timings are recorded by the retriever."""
+        backend, retriever = self.load_index()
+        results, _ = retriever.search(query, embedding_fn or backend.embed_query, top_k=top_k)
+        annotate(results=len(results))
+        return results
+
+    def answer(self, emp_id, query: str, top_k: int = 2) -> Dict[str, Any]:
+        """
+        Answer one question for one employee. Returns {"intent", "matched", "answer"}
+        for keyword intents or {"intent": "doc_search", "results": [...]} otherwise.
+        Raises LookupError for an employee without a stored context.
+        """
+        if self.load_context(emp_id) is None:
+            raise LookupError(f"Employee {emp_id} not found in the context store")
+        matched = self.route(query)
+        if matched:
+            return {"intent": matched[0], "matched": matched, "answer": self.intent_answer(emp_id, matched, query)}
+        return {"intent": "doc_search", "matched": [], "results": self.search(query, top_k)}
+
+    # ---- Async ----
+
+    async def run_blocking(self, fn: Callable, *args: Any) -> Any:
+        """Run fn on the engine's worker pool, keeping the caller's trace context."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._threads, thread_name_prefix="leavebot-engine")
+        ctx = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, ctx.run, fn, *args)
+
+    async def answer_async(self, emp_id, query: str, top_k: int = 2) -> Dict[str, Any]:
+        """
+        answer() for async callers. Routing runs on the event loop (microseconds);
+        context reads, team queries and the doc search with its embedding call run on
+        the worker pool, so slow embedding API calls never block other requests.
+        """
+        if await self.run_blocking(self.load_context, emp_id) is None:
+            raise LookupError(f"Employee {emp_id} not found in the context store")
+        matched = self.route(query)
+        if matched:
+            answer = await self.run_blocking(self.intent_answer, emp_id, matched, query)
+            return {"intent": matched[0], "matched": matched, "answer": answer}
+        return {"intent": "doc_search", "matched": [], "results": await self.run_blocking(self.search, query, top_k)}
+
+    def profile(self, emp_id) -> Optional[Dict[str, Any]]:
+        """Name and profile summary for an employee (None if unknown)."""
+        ctx = self.load_context(emp_id)
+        if ctx is None:
+            return None
+        return {"emp_id": str(emp_id), "name": EmployeeHelpers(ctx["employee"]).get_full_name(),
+                "summary": get_answers(ctx)["summary"]}
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Script usage:
+#   python -m leavebot.api.engine 682 "what is my leave balance"
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Answer one question for one employee.")
+    parser.add_argument("emp_id")
+    parser.add_argument("query")
+    parser.add_argument("--top-k", type=int, default=2)
+    args = parser.parse_args()
+    print(json.dumps(AnswerEngine().answer(args.emp_id, args.query, args.top_k), indent=2, ensure_ascii=False))
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_PATH = os.getenv("ERP_CACHE_PATH", "leavebot/data/erp_cache.sqlite3")
+
+# Seconds a response stays fresh, per client endpoint. Leave types follow the
+# leave policy and change rarely; balances move whenever leave is applied.
+DEFAULT_TTLS = {
+    "employee_details": float(os.getenv("ERP_CACHE_TTL_EMPLOYEE", 3600)),
+    "leave_types": float(os.getenv("ERP_CACHE_TTL_LEAVE_TYPES", 6 * 3600)),
+    "leave_balance": float(os.getenv("ERP_CACHE_TTL_BALANCE", 300)),
+}
+
+
+def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """Cache key: endpoint name plus the request parameters in a stable order."""
+    return endpoint + "?" + json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ResponseCache:
+    """
+    TTL cache for ERP API responses, keyed by (endpoint, request params).
+    Tier 1 is an in-process LRU bounded by max_items, tier 2 an optional SQLite
+    file shared across processes and restarts. Entries carry their emp_id so one
+    employee's responses can be invalidated after a change.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_items: int = 10_000,
+        path: Optional[str] = None,
+    ):
+        """
+        :param ttls: Per-endpoint TTL in seconds (merged over DEFAULT_TTLS); 0 disables caching for an endpoint
+        :param max_items: LRU capacity of the in-process tier
+        :param path: SQLite file for the disk tier; None keeps the cache in memory only
+        """
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_items = max_items
+        self.path = path or None
+        self._memory: "OrderedDict[str, Tuple[Any, float, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, emp_id TEXT,"
+                " data TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_emp ON responses(emp_id)")
+            self._conn.commit()
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, 0.0)
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0:
+            return None
+        key = make_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if now - item[1] <= ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return item[0]
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT data, created_at, emp_id FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] <= ttl:
+                    data = json.loads(row[0])
+                    self._remember(key, data, row[1], endpoint, row[2])
+                    self.hits += 1
+                    return data
+
+            self.misses += 1
+            return None
+
+    def put(self, endpoint: str, params: Dict[str, Any], data: Any, emp_id=None) -> None:
+        if self.ttl_for(endpoint) <= 0:
+            return
+        key = make_key(endpoint, params)
+        emp_key = None if emp_id is None else str(emp_id)
+        now = time.time()
+        with self._lock:
+            self._remember(key, data, now, endpoint, emp_key)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, endpoint, emp_id, data, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, endpoint, emp_key, json.dumps(data, ensure_ascii=False), now),
+                )
+                self._conn.commit()
+
+    def invalidate(self, endpoint: Optional[str] = None, emp_id=None) -> int:
+        """
+        Drop cached responses for an endpoint, an employee, or both (everything if
+        neither is given). Returns the number of in-process entries removed.
+        """
+        emp_key = None if emp_id is None else str(emp_id)
+        with self._lock:
+            doomed = [
+                key for key, (_, _, ep, emp) in self._memory.items()
+                if (endpoint is None or ep == endpoint) and (emp_key is None or emp == emp_key)
+            ]
+            for key in doomed:
+                del self._memory[key]
+            if self._conn is not None:
+                clauses, args = [], []
+                if endpoint is not None:
+                    clauses.append("endpoint = ?")
+                    args.append(endpoint)
+                if emp_key is not None:
+                    clauses.append("emp_id = ?")
+                    args.append(emp_key)
+                where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+                self._conn.execute(f"DELETE FROM responses{where}", args)
+                self._conn.commit()
+        return len(doomed)
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def purge_expired(self) -> None:
+        """Delete expired rows from the disk tier (the memory tier expires lazily)."""
+        if self._conn is None:
+            return
+        now = time.time()
+        with self._lock:
+            for endpoint, ttl in self.ttls.items():
+                self._conn.execute(
+                    "DELETE FROM responses WHERE endpoint = ? AND created_at < ?", (endpoint, now - ttl)
+                )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "memory_items": len(self._memory)}
+
+    def _remember(self, key: str, data: Any, created_at: float, endpoint: str, emp_id: Optional[str]) -> None:
+        self._memory[key] = (data, created_at, endpoint, emp_id)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
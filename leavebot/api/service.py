@@ -0,0 +1,202 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from leavebot.api.engine import AnswerEngine
+from leavebot.core.metrics import METRICS, trace
+
+# Headless query service for the intranet portal and chat integrations, next to the
+# Streamlit UI. A plain ASGI application (no web framework needed); serve it with any
+# ASGI server, e.g. `pip install uvicorn` and `python -m leavebot.api.service`.
+#
+#   GET  /ask?emp=682&q=what+is+my+leave+balance[&top_k=2]
+#   POST /ask  {"emp": 682, "q": "..."}
+#   GET  /profile?emp=682
+#   GET  /metrics           Prometheus text (?format=json for JSON)
+#   GET  /healthz
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", 8080))
+MAX_BODY_BYTES = 64 * 1024
+# Largest top_k a client may ask for (doc search results per answer)
+MAX_TOP_K = int(os.getenv("MAX_TOP_K", 20))
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class LeaveBotService:
+    """
+    ASGI app over one shared AnswerEngine: every request in the process uses the same
+    doc index, context cache and reporting tree. Handlers are coroutines; the engine
+    runs embedding calls and store reads on its worker pool, so many requests can wait
+    on the embedding API at once without blocking the event loop.
+    """
+
+    def __init__(self, engine: Optional[AnswerEngine] = None):
+        self._engine = engine
+        self.routes: Dict[Tuple[str, str], Callable[[Dict[str, Any]], Awaitable[Tuple[int, Any]]]] = {
+            ("GET", "/ask"): self.ask,
+            ("POST", "/ask"): self.ask,
+            ("GET", "/profile"): self.profile,
+            ("GET", "/metrics"): self.metrics,
+            ("GET", "/healthz"): self.healthz,
+        }
+
+    @property
+    def engine(self) -> AnswerEngine:
+        if self._engine is None:
+            self._engine = AnswerEngine()
+        return self._engine
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    # Load the doc index before the first request instead of during it
+                    await asyncio.get_running_loop().run_in_executor(None, self.engine.load_index)
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._engine is not None:
+                    self._engine.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope["path"].rstrip("/") or "/"
+        handler = self.routes.get((scope["method"], path))
+        try:
+            if handler is None:
+                known = {route for _, route in self.routes}
+                raise HTTPError(405 if path in known else 404, "Method not allowed" if path in known else "Not found")
+            params = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()}
+            if scope["method"] == "POST":
+                params.update(await self._read_json(receive))
+            status, body = await handler(params)
+        except HTTPError as e:
+            status, body = e.status, {"error": e.message}
+        except Exception as e:
+            logging.exception(f"Error handling {scope['method']} {scope['path']}: {e}")
+            status, body = 500, {"error": "Internal error"}
+        if isinstance(body, str):
+            await self._respond(send, status, body.encode("utf-8"), b"text/plain; version=0.0.4; charset=utf-8")
+        else:
+            await self._respond(send, status, json.dumps(body, ensure_ascii=False).encode("utf-8"), b"application/json")
+
+    async def _read_json(self, receive: Receive) -> Dict[str, Any]:
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, "Request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+        raw = b"".join(chunks)
+        if not raw:
+            return {}
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return body
+
+    @staticmethod
+    async def _respond(send: Send, status: int, body: bytes, content_type: bytes) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _emp_id(params: Dict[str, Any]) -> str:
+        emp_id = str(params.get("emp") or "").strip()
+        if not emp_id:
+            raise HTTPError(400, "Missing emp parameter, e.g. /ask?emp=682&q=...")
+        return emp_id
+
+    # ---- Handlers ----
+
+    async def ask(self, params: Dict[str, Any]) -> Tuple[int, Any]:
+        emp_id = self._emp_id(params)
+        query = str(params.get("q") or params.get("query") or "").strip()
+        if not query:
+            raise HTTPError(400, "Missing q parameter")
+        try:
+            top_k = int(params.get("top_k", 2))
+        except (TypeError, ValueError):
+            raise HTTPError(400, "top_k must be an integer")
+        if not 1 <= top_k <= MAX_TOP_K:
+            raise HTTPError(400, f"top_k must be between 1 and {MAX_TOP_K}")
+        with trace("ask", emp_id=emp_id, source="service"):
+            try:
+                reply = await self.engine.answer_async(emp_id, query, top_k)
+            except LookupError as e:
+                raise HTTPError(404, str(e))
+        return 200, {"emp_id": emp_id, **reply}
+
+    async def profile(self, params: Dict[str, Any]) -> Tuple[int, Any]:
+        emp_id = self._emp_id(params)
+        profile = await self.engine.run_blocking(self.engine.profile, emp_id)
+        if profile is None:
+            raise HTTPError(404, f"Employee {emp_id} not found in the context store")
+        return 200, profile
+
+    async def metrics(self, params: Dict[str, Any]) -> Tuple[int, Any]:
+        if params.get("format") == "json":
+            return 200, METRICS.to_json()
+        return 200, METRICS.to_prometheus()
+
+    async def healthz(self, params: Dict[str, Any]) -> Tuple[int, Any]:
+        return 200, {"status": "ok"}
+
+
+app = LeaveBotService()
+
+
+# Script usage:
+#   pip install uvicorn
+#   python -m leavebot.api.service [--host 0.0.0.0] [--port 8080]
+#   curl 'http://127.0.0.1:8080/ask?emp=682&q=what+is+my+leave+balance'
+# Or with any ASGI server: uvicorn leavebot.api.service:app --workers 4
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve LeaveBot answers over HTTP.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is not installed: pip install uvicorn (or run leavebot.api.service:app under another ASGI server)")
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    uvicorn.run(app, host=args.host, port=args.port)
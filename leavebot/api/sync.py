@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from leavebot.api.client import ERPApiClient
+from leavebot.api.throttle import RequestThrottle
+from leavebot.core.context_store import ContextStore
+from leavebot.domain.answers import ANSWERS_VERSION, materialize_answers
+from leavebot.domain.mapping import MAPPING_VERSION, build_full_context
+
+DEFAULT_CHECKPOINT = "leavebot/data/sync_checkpoint.json"
+
+
+class SyncCheckpoint:
+    """
+    Progress file for a roster sync: employees already stored and the last error
+    for those that failed. Written atomically so an interrupted run can resume.
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT):
+        self.path = path
+        self.done: Set[str] = set()
+        self.failed: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.done = set(data.get("done", []))
+            self.failed = data.get("failed", {})
+
+    def mark_done(self, emp_ids: Iterable[str]) -> None:
+        for emp_id in emp_ids:
+            self.done.add(emp_id)
+            self.failed.pop(emp_id, None)
+
+    def mark_failed(self, emp_id: str, reason: str) -> None:
+        self.failed[emp_id] = reason
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"done": sorted(self.done), "failed": self.failed}, f)
+        os.replace(tmp_path, self.path)
+
+    def reset(self) -> None:
+        self.done, self.failed = set(), {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _hash(payload: Any) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def fingerprint_payload(api_data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Content hashes of the raw ERP payloads (HrmGetEmployeeDetails, FillLeaveType,
+    balance rows) plus a combined fingerprint that also covers MAPPING_VERSION and
+    ANSWERS_VERSION.
+    """
+    parts = {
+        "employee_hash": _hash(api_data.get("employee")),
+        "leave_types_hash": _hash(api_data.get("leave_types")),
+        "balances_hash": _hash({str(k): v for k, v in (api_data.get("leave_balances") or {}).items()}),
+    }
+    parts["fingerprint"] = _hash([
+        MAPPING_VERSION, ANSWERS_VERSION,
+        parts["employee_hash"], parts["leave_types_hash"], parts["balances_hash"],
+    ])
+    return parts
+
+
+def sync_one(
+    client: ERPApiClient,
+    emp_id: int,
+    known_fingerprint: Optional[str] = None,
+    materialize: bool = True,
+) -> Dict[str, Any]:
+    """
+    Fetch one employee and map it only if its raw payload changed since the last sync.
+    Returns the sync state; it carries the mapped "context" (with its canned answers
+    rendered, if materialize) when the payload changed.
+    """
+    api_data = client.fetch_all_data(emp_id)
+    if not api_data["employee"]:
+        raise LookupError(f"No employee details returned for {emp_id}")
+    state: Dict[str, Any] = {"emp_id": str(emp_id), **fingerprint_payload(api_data)}
+    state["changed"] = state["fingerprint"] != known_fingerprint
+    if state["changed"]:
+        ctx = build_full_context(api_data)
+        state["context"] = materialize_answers(ctx) if materialize else ctx
+    return state
+
+
+def sync_roster(
+    emp_ids: Iterable[int],
+    concurrency: int = 8,
+    rps: Optional[float] = None,
+    store: Optional[ContextStore] = None,
+    checkpoint: Optional[SyncCheckpoint] = None,
+    batch_size: int = 200,
+    client: Optional[ERPApiClient] = None,
+    full: bool = False,
+    materialize: bool = True,
+) -> Dict[str, Any]:
+    """
+    Fetch, map and store contexts for many employees.
+    Each raw ERP payload is fingerprinted; employees whose fingerprint matches the
+    last sync are not remapped or rewritten (only their last-synced time moves),
+    unless full=True. With materialize, stored contexts include their rendered answers.
+    At most `concurrency` ERP requests are in flight and at most `rps` start per second,
+    across all employees. Transient ERP errors are retried by the client with
+    jittered exponential backoff. Contexts are upserted in batches and only then
+    checkpointed, so rerunning after an interruption (or with failures) skips
+    employees already stored. A run without failures clears its checkpoint.
+    Returns run statistics including throughput.
+    """
+    store = store if store is not None else ContextStore()
+    checkpoint = checkpoint if checkpoint is not None else SyncCheckpoint()
+    client = client or ERPApiClient(
+        pool_size=concurrency,
+        throttle=RequestThrottle(concurrency, rps),
+        raise_errors=True,
+    )
+    requested = list(dict.fromkeys(int(e) for e in emp_ids))
+    todo = [e for e in requested if str(e) not in checkpoint.done]
+    stats = {
+        "requested": len(requested), "synced": 0, "changed": 0, "unchanged": 0,
+        "failed": 0, "skipped": len(requested) - len(todo),
+    }
+    known = {} if full else store.get_fingerprints(todo)
+    start = time.perf_counter()
+
+    pending: List[Dict[str, Any]] = []
+
+    def flush():
+        if pending:
+            contexts = [state.pop("context") for state in pending if state["changed"]]
+            store.upsert_many(contexts)
+            store.record_sync(pending)
+            checkpoint.mark_done(state["emp_id"] for state in pending)
+            stats["synced"] += len(pending)
+            stats["changed"] += len(contexts)
+            stats["unchanged"] += len(pending) - len(contexts)
+            pending.clear()
+        checkpoint.save()
+
+    # Employees are submitted in a bounded window so memory does not grow with the roster
+    window = concurrency * 4
+    remaining = iter(todo)
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            while True:
+                while len(in_flight) < window:
+                    emp_id = next(remaining, None)
+                    if emp_id is None:
+                        break
+                    in_flight[pool.submit(sync_one, client, emp_id, known.get(str(emp_id)), materialize)] = emp_id
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    emp_id = str(in_flight.pop(future))
+                    try:
+                        pending.append(future.result())
+                    except Exception as e:
+                        logging.error(f"Sync failed for emp_id={emp_id}: {e}")
+                        checkpoint.mark_failed(emp_id, str(e))
+                        stats["failed"] += 1
+                if len(pending) >= batch_size:
+                    flush()
+        finally:
+            # Also persist progress when interrupted (Ctrl+C)
+            for future in in_flight:
+                future.cancel()
+            flush()
+
+    # A run that finished without failures starts from scratch next time (e.g. the next
+    # nightly sync); unchanged employees are then cheap thanks to the fingerprints.
+    if stats["failed"] == 0:
+        checkpoint.reset()
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_s"] = elapsed
+    stats["per_second"] = stats["synced"] / elapsed if elapsed else 0.0
+    return stats
+
+
+def parse_emp_ids(spec: str) -> List[int]:
+    """Parse '682', '1,2,3', '100-200' or a mix like '1-10,15'."""
+    ids: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            ids.extend(range(int(lo), int(hi) + 1))
+        else:
+            ids.append(int(part))
+    return ids
+
+
+# Script usage:
+#   python -m leavebot.api.sync --ids 1-5000 --concurrency 8 --rps 20
+#   python -m leavebot.api.sync --file roster_ids.txt
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sync employee contexts from the ERP into the context store.")
+    parser.add_argument("--ids", help="Employee IDs: '682', '1,2,3' or '100-200'")
+    parser.add_argument("--file", help="File with one employee ID per line")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max ERP requests in flight")
+    parser.add_argument("--rps", type=float, default=None, help="Max ERP requests started per second")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--reset", action="store_true", help="Ignore earlier progress and sync everyone again")
+    parser.add_argument("--full", action="store_true", help="Remap and rewrite contexts even if the ERP data is unchanged")
+    parser.add_argument("--no-answers", action="store_true", help="Do not store pre-rendered answers with the contexts")
+    args = parser.parse_args()
+
+    emp_ids = parse_emp_ids(args.ids) if args.ids else []
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            emp_ids += [int(line) for line in f if line.strip()]
+    if not emp_ids:
+        parser.error("Give employee IDs with --ids and/or --file")
+
+    checkpoint = SyncCheckpoint(args.checkpoint)
+    if args.reset:
+        checkpoint.reset()
+    stats = sync_roster(emp_ids, args.concurrency, args.rps, checkpoint=checkpoint, full=args.full, materialize=not args.no_answers)
+    print(
+        f"Synced {stats['synced']} of {stats['requested']} employees in {stats['elapsed_s']:.1f}s "
+        f"({stats['per_second']:.1f}/s): {stats['changed']} contexts updated, {stats['unchanged']} unchanged; "
+        f"{stats['failed']} failed, {stats['skipped']} already done"
+    )
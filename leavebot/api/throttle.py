@@ -0,0 +1,42 @@
+import time
+import threading
+from typing import Optional
+
+
+class RequestThrottle:
+    """
+    Shared limit on outbound ERP requests: at most max_concurrency in flight
+    and (optionally) at most rps started per second, across all threads.
+    Use as a context manager around each request.
+    """
+
+    def __init__(self, max_concurrency: int = 8, rps: Optional[float] = None):
+        self.max_concurrency = max_concurrency
+        self.rps = rps
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = time.monotonic()
+
+    def _wait_for_rate(self) -> None:
+        if not self.rps:
+            return
+        # Reserve the next start slot, then sleep until it arrives
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + 1.0 / self.rps
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def __enter__(self) -> "RequestThrottle":
+        self._slots.acquire()
+        try:
+            self._wait_for_rate()
+        except BaseException:
+            self._slots.release()
+            raise
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._slots.release()
@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from typing import Any, Dict, List
+
+import numpy as np
+
+from leavebot.bench.suite import SUITES, bench_mapping, bench_retrieval, compare, primary_metric, result_key
+
+DEFAULT_BASELINE_PATH = "leavebot/data/bench_baseline.json"
+
+# Script usage:
+#   python -m leavebot.bench                          # full suite (1k/10k/100k sections, 1k/10k employees)
+#   python -m leavebot.bench --quick                  # smoke run, small sizes
+#   python -m leavebot.bench --only retrieval --sections 100000,500000
+#   python -m leavebot.bench --save                   # write leavebot/data/bench_baseline.json
+#   python -m leavebot.bench --compare                # compare against it; exit 1 on regressions
+
+
+def _sizes(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def _format(result: Dict[str, Any]) -> str:
+    metric = primary_metric(result)
+    if metric == "median_us":
+        main = f"{result['median_us']:10.1f} us  p95 {result['p95_us']:10.1f} us  {result['ops_per_s']:12.0f} ops/s"
+    else:
+        main = f"{result['seconds']:10.3f} s "
+        if "per_second" in result:
+            main += f"  {result['per_second']:10.0f} /s"
+    for extra in ("peak_mb", "matrix_mb"):
+        if extra in result:
+            main += f"  {extra.split('_')[0]} {result[extra]:.1f} MB"
+    return f"{result_key(result):<62} {main}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LeaveBot benchmark suite (synthetic data, no ERP or OpenAI calls).")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"Comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument("--quick", action="store_true", help="Small sizes for a fast smoke run")
+    parser.add_argument("--sections", type=_sizes, help="Corpus sizes for retrieval (default 1000,10000,100000)")
+    parser.add_argument("--dim", type=int, default=256, help="Embedding dimension of the synthetic corpus")
+    parser.add_argument("--employees", type=_sizes, help="Roster sizes for mapping (default 1000,10000)")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE_PATH, help="Write results as a baseline JSON")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE_PATH, help="Compare with a baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    sections = args.sections or ([1000, 10_000] if args.quick else [1000, 10_000, 100_000])
+    employees = args.employees or ([200] if args.quick else [1000, 10_000])
+    runners = {
+        "retrieval": lambda: bench_retrieval(sections, args.dim),
+        "mapping": lambda: bench_mapping(employees),
+    }
+
+    results: List[Dict[str, Any]] = []
+    for name in args.only.split(","):
+        if name not in SUITES:
+            parser.error(f"Unknown suite '{name}'. Use: {', '.join(SUITES)}")
+        print(f"== {name}")
+        t = time.perf_counter()
+        for result in runners.get(name, SUITES[name])():
+            print(_format(result))
+            results.append(result)
+        print(f"   ({time.perf_counter() - t:.1f} s)")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "machine": platform.machine(),
+                    "cpus": os.cpu_count(),
+                },
+                "results": {result_key(r): r for r in results},
+            }, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance)
+        print(f"== compared with {args.compare} ({baseline.get('meta', {}).get('created', '?')})")
+        for row in rows:
+            flag = {"slower": "REGRESSION", "faster": "improved"}.get(row["verdict"], "")
+            print(f"{row['key']:<62} {row['ratio']:6.2f}x  {flag}")
+        regressions = [row for row in rows if row["verdict"] == "slower"]
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import os
+import json
+import copy
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+from leavebot.core.search_embeddings import DocKnowledgeIndex, normalize_rows
+
+SAMPLE_API_OUTPUT = "leavebot/data/api_output.json"
+
+TOPICS = [
+    "annual", "sick", "maternity", "paternity", "hajj", "umrah", "casual", "emergency",
+    "business", "compassionate", "unpaid", "probation", "air", "ticket", "accommodation",
+    "shift", "overtime", "visa", "residence", "permit", "gratuity", "notice", "resignation",
+    "transfer", "training", "medical", "insurance", "allowance", "carry", "encashment",
+]
+FILLER = [
+    "employee", "leave", "days", "policy", "approval", "manager", "request", "balance",
+    "eligible", "month", "year", "salary", "company", "working", "service", "entitled",
+    "apply", "period", "calendar", "submit", "document", "payroll", "grade", "contract",
+]
+DEPARTMENTS = ["Operation_Cleaning", "Operation_Security", "Finance", "HR", "IT", "Procurement", "Facilities", "Sales"]
+NATIONALITIES = ["INDIAN", "KENYAN", "NEPALESE", "FILIPINO", "EGYPTIAN", "QATARI", "SRI LANKAN", "BANGLADESHI"]
+
+
+def synthetic_corpus(
+    n_sections: int,
+    dim: int = 256,
+    n_topics: int = 64,
+    seed: int = 0,
+) -> DocKnowledgeIndex:
+    """
+    Synthetic doc knowledge: n_sections unit-length float32 embeddings scattered around
+    n_topics topic centres, with short section titles/texts drawn from a leave-policy
+    vocabulary (so BM25 and hybrid retrieval have real terms to match).
+    """
+    rng = np.random.default_rng(seed)
+    centres = normalize_rows(rng.standard_normal((n_topics, dim)).astype(np.float32))
+    topic_of = rng.integers(0, n_topics, n_sections)
+    matrix = centres[topic_of] + 0.6 / np.sqrt(dim) * rng.standard_normal((n_sections, dim)).astype(np.float32)
+    normalize_rows(matrix)
+
+    words = rng.integers(0, len(FILLER), (n_sections, 12))
+    entries = []
+    for i in range(n_sections):
+        topic = TOPICS[topic_of[i] % len(TOPICS)]
+        text = " ".join(FILLER[w] for w in words[i])
+        entries.append({
+            "section": f"{topic.title()} leave policy > clause {i}",
+            "text": f"{topic} {text} {topic}.",
+        })
+    return DocKnowledgeIndex(matrix, entries)
+
+
+def synthetic_queries(index: DocKnowledgeIndex, n_queries: int, noise: float = 0.3, seed: int = 1) -> Tuple[np.ndarray, List[str]]:
+    """
+    Query embeddings near random sections (noise relative to unit length) and
+    matching query texts built from those sections' topic words.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(index), n_queries)
+    dim = index.matrix.shape[1]
+    queries = np.asarray(index.matrix[rows], dtype=np.float32) + noise / np.sqrt(dim) * rng.standard_normal((n_queries, dim)).astype(np.float32)
+    texts = []
+    for row in rows:
+        words = index.entries[row]["text"].split()
+        texts.append(f"how many {words[0]} {words[1]} {words[2]} days")
+    return normalize_rows(queries), texts
+
+
+def _load_template(path: str = SAMPLE_API_OUTPUT) -> Dict[str, Any]:
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    # Minimal stand-in with the same shape as api_output.json
+    return {
+        "employee": [{"Emp_ID_N": 1, "Emp_Code_V": "1", "Emp_EFullName_V": "EMPLOYEE", "Emp_DOJ_D": "01-Jan-2020"}],
+        "leave_types": [
+            {"Lpd_ID_N": 68, "Lvm_Code_V": "AL", "Lvm_Description_V": "ANNUAL LEAVE", "Lvm_ShwSelfService_N": "1",
+             "Lvm_AttachRequired_N": "0", "Emp_AnnivDate_D": "01-Jan-2025", "Lpd_EligibilityOnWrkdays_N": "1"},
+            {"Lpd_ID_N": 69, "Lvm_Code_V": "SL", "Lvm_Description_V": "SICK LEAVE", "Lvm_ShwSelfService_N": "1",
+             "Lvm_AttachRequired_N": "1", "Emp_AnnivDate_D": "01-Jan-2025", "Lpd_EligibilityOnWrkdays_N": "0"},
+        ],
+        "leave_balances": {
+            "68": [{"DAYS": 21, "Maxdays": 0, "Balance": 30, "Eligible": "30", "Paid": "30", "UnPaid": "0",
+                    "AirTicketPercent": "100", "Airticket": "1", "Lpd_AllowHalfDay_N": "0", "Emp_AnnivDate_D": "01-Jan-2024"}],
+            "69": [{"DAYS": 14, "Maxdays": 0, "Balance": 14, "Eligible": "14", "Paid": "14", "UnPaid": "0",
+                    "AirTicketPercent": "0", "Airticket": "0", "Lpd_AllowHalfDay_N": "0", "Emp_AnnivDate_D": "01-Jan-2024"}],
+        },
+    }
+
+
+def _fmt(day: date) -> str:
+    return day.strftime("%d-%b-%Y")
+
+
+def synthetic_erp_payloads(
+    n_employees: int,
+    seed: int = 0,
+    template: Optional[Dict[str, Any]] = None,
+    first_emp_id: int = 1,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Raw ERP records shaped like api_output.json (fetch_all_data output), one per
+    employee: distinct ids, names, departments, dates, managers and balances.
+    Generated lazily, so large rosters do not have to fit in memory.
+    """
+    template = template or _load_template()
+    base_emp = template["employee"][0]
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    for n in range(n_employees):
+        emp_id = first_emp_id + n
+        doj = today - timedelta(days=int(rng.integers(30, 9000)))
+        emp = dict(
+            base_emp,
+            Emp_ID_N=emp_id,
+            Emp_Code_V=str(10000 + emp_id),
+            Emp_EFullName_V=f"EMPLOYEE {emp_id}",
+            Emp_EDisplayName_V=f"EMPLOYEE {emp_id}",
+            Emp_DOJ_D=_fmt(doj),
+            Emp_ProbationEndDate_D=_fmt(doj + timedelta(days=180)),
+            Emp_RPExpiryDate_D=_fmt(today + timedelta(days=int(rng.integers(-60, 700)))),
+            Emp_ReportingToID_N=str(first_emp_id + int(rng.integers(0, n))) if n else "",
+            Dpm_Desc_V=DEPARTMENTS[int(rng.integers(0, len(DEPARTMENTS)))],
+            Cnt_Nationality_V=NATIONALITIES[int(rng.integers(0, len(NATIONALITIES)))],
+        )
+        balances = {}
+        for lpd_id, rows in template["leave_balances"].items():
+            if not rows:
+                balances[lpd_id] = rows
+                continue
+            row = dict(rows[0])
+            balance = int(rng.integers(0, 90))
+            row["Balance"] = balance
+            row["Eligible"] = f"{balance + rng.random():.2f}"
+            balances[lpd_id] = [row]
+        yield {
+            "employee": [emp],
+            "leave_types": copy.deepcopy(template["leave_types"]),
+            "leave_balances": balances,
+        }
+
+
+def write_erp_dump(path: str, n_employees: int, seed: int = 0) -> str:
+    """Write synthetic raw ERP records as JSONL (input for mapping --stream)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for record in synthetic_erp_payloads(n_employees, seed):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return path
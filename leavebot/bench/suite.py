@@ -0,0 +1,228 @@
+import os
+import time
+import tempfile
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from leavebot.bench.generators import synthetic_corpus, synthetic_erp_payloads, synthetic_queries
+
+ROUTING_QUERIES = [
+    "what is my leave balance",
+    "am I still on probation?",
+    "which leaves give an air ticket",
+    "who in my team is on probation",
+    "how many days of maternity leave do I get after two years of service?",
+]
+
+
+def measure(fn: Callable[[], Any], repeat: int = 20, number: int = 1, warmup: int = 1) -> Dict[str, float]:
+    """
+    Time fn: `repeat` samples of `number` calls each, after `warmup` untimed calls.
+    Returns median and p95 per call in microseconds and calls per second.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t) / number)
+    samples_us = np.asarray(samples) * 1e6
+    median = float(np.median(samples_us))
+    return {
+        "median_us": median,
+        "p95_us": float(np.percentile(samples_us, 95)),
+        "ops_per_s": 1e6 / median if median else 0.0,
+    }
+
+
+def peak_memory(fn: Callable[[], Any]) -> float:
+    """Peak traced Python memory (MB) while running fn once."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    t = time.perf_counter()
+    fn()
+    return time.perf_counter() - t
+
+
+def _result(results: List[Dict[str, Any]], name: str, params: Dict[str, Any], metrics: Dict[str, float]) -> None:
+    results.append({"name": name, "params": params, **metrics})
+
+
+def bench_retrieval(sizes: Iterable[int] = (1000, 10_000, 100_000), dim: int = 256, top_k: int = 5) -> List[Dict[str, Any]]:
+    """Query latency of dense, batched, IVF, lexical and hybrid retrieval over synthetic corpora."""
+    from leavebot.core.bm25 import BM25Index
+    from leavebot.core.ivf_index import IVFIndex
+    from leavebot.core.retrieval import HybridRetriever
+    from leavebot.core.search_embeddings import search_doc_knowledge
+
+    results: List[Dict[str, Any]] = []
+    for n in sizes:
+        params = {"sections": n, "dim": dim}
+        t = time.perf_counter()
+        index = synthetic_corpus(n, dim)
+        build_s = time.perf_counter() - t
+        query_embs, query_texts = synthetic_queries(index, 64)
+        _result(results, "corpus.generate", params, {"seconds": build_s, "matrix_mb": index.matrix.nbytes / 1e6})
+
+        repeat = 20 if n <= 100_000 else 5
+        q = iter(range(10 ** 9))
+        _result(results, "retrieval.dense", params,
+                measure(lambda: index.search(query_embs[next(q) % 64], top_k), repeat))
+
+        _result(results, "retrieval.search_doc_knowledge", params,
+                measure(lambda: search_doc_knowledge("q", index, lambda _: query_embs[0], top_k=top_k), repeat))
+
+        batch = measure(lambda: index.search_batch(query_embs, top_k), max(3, repeat // 4))
+        _result(results, "retrieval.dense_batch64_per_query", params,
+                {k: (v / 64 if k != "ops_per_s" else v * 64) for k, v in batch.items()})
+
+        t = time.perf_counter()
+        ivf = IVFIndex.build(index, n_iter=10)
+        _result(results, "ivf.build", params, {"seconds": time.perf_counter() - t})
+        _result(results, "retrieval.ivf", params,
+                measure(lambda: ivf.search(query_embs[next(q) % 64], top_k), repeat))
+
+        t = time.perf_counter()
+        bm25 = BM25Index.from_entries(index.entries)
+        _result(results, "bm25.build", params, {"seconds": time.perf_counter() - t})
+        retriever = HybridRetriever(index, bm25)
+        embed = dict(zip(query_texts, query_embs)).__getitem__
+        _result(results, "retrieval.lexical", params,
+                measure(lambda: retriever.retrieve(query_texts[next(q) % 64], embed, top_k, mode="lexical"), repeat))
+        _result(results, "retrieval.hybrid", params,
+                measure(lambda: retriever.retrieve(query_texts[next(q) % 64], embed, top_k, mode="hybrid"), repeat))
+        del index, ivf, bm25, retriever
+    return results
+
+
+def bench_mapping(employee_counts: Iterable[int] = (1000, 10_000)) -> List[Dict[str, Any]]:
+    """Mapping throughput (dicts, records, streaming into a context store) and memory peaks."""
+    from leavebot.core.context_store import ContextStore
+    from leavebot.domain.answers import materialize_answers
+    from leavebot.domain.mapping import build_full_context, stream_map_to_store
+    from leavebot.bench.generators import write_erp_dump
+
+    results: List[Dict[str, Any]] = []
+    for n in employee_counts:
+        params = {"employees": n}
+        raw = list(synthetic_erp_payloads(n))
+        for name, fn in (
+            ("mapping.build_full_context", lambda r: build_full_context(r)),
+            ("mapping.build_full_context_records", lambda r: build_full_context(r, as_record=True)),
+            ("mapping.build_and_materialize", lambda r: materialize_answers(build_full_context(r))),
+        ):
+            elapsed = min(_timed(lambda: [fn(r) for r in raw]) for _ in range(3))
+            peak = peak_memory(lambda: [fn(r) for r in raw])
+            _result(results, name, params, {"seconds": elapsed, "per_second": n / elapsed, "peak_mb": peak})
+        del raw
+
+        with tempfile.TemporaryDirectory() as tmp:
+            dump = write_erp_dump(os.path.join(tmp, "dump.jsonl"), n)
+            stores = [ContextStore(os.path.join(tmp, f"contexts{i}.sqlite3")) for i in range(2)]
+            t = time.perf_counter()
+            stats = stream_map_to_store(dump, stores[0], batch_size=1000)
+            elapsed = time.perf_counter() - t
+            # Traced separately: tracemalloc slows the run it measures
+            peak = peak_memory(lambda: stream_map_to_store(dump, stores[1], batch_size=1000))
+            for store in stores:
+                store.close()
+            _result(results, "mapping.stream_to_store", params,
+                    {"seconds": elapsed, "per_second": stats["written"] / elapsed, "peak_mb": peak})
+    return results
+
+
+def bench_helpers() -> List[Dict[str, Any]]:
+    """Per-call cost of the domain helpers on one synthetic employee."""
+    from leavebot.domain.air_ticket import AirTicketEligibility
+    from leavebot.domain.answers import render_answers
+    from leavebot.domain.employee_helpers import EmployeeHelpers
+    from leavebot.domain.leave_helpers import LeaveHelpers
+    from leavebot.domain.leave_resolver import LeaveTypeResolver
+    from leavebot.domain.mapping import build_full_context
+
+    ctx = build_full_context(next(synthetic_erp_payloads(1)))
+    leave = LeaveHelpers(ctx["leave_balances"], ctx["leave_types"])
+    emp = EmployeeHelpers(ctx["employee"])
+    air = AirTicketEligibility(ctx["leave_balances"], ctx["leave_types"])
+    code_to_desc = {lt["code"]: lt["desc"] for lt in ctx["leave_types"]}
+
+    results: List[Dict[str, Any]] = []
+    cases = [
+        ("helpers.leave_helpers_init", lambda: LeaveHelpers(ctx["leave_balances"], ctx["leave_types"])),
+        ("helpers.can_apply_for", lambda: leave.can_apply_for("annual leave")),
+        ("helpers.can_apply_for_typo", lambda: leave.can_apply_for("anual leave")),
+        ("helpers.leave_balances_summary", leave.leave_balances_summary),
+        ("helpers.air_ticket_is_eligible", lambda: air.is_eligible("annual leave")),
+        ("helpers.employee_summary", emp.get_summary),
+        ("helpers.resolver_cold_typo", lambda: LeaveTypeResolver(code_to_desc).resolve("anual leave")),
+        ("helpers.render_answers", lambda: render_answers(ctx)),
+    ]
+    for name, fn in cases:
+        _result(results, name, {}, measure(fn, repeat=50, number=20))
+    return results
+
+
+def bench_routing(extra_intents: Iterable[int] = (0, 1000)) -> List[Dict[str, Any]]:
+    """Keyword routing cost with the app's intents, optionally padded with synthetic ones."""
+    from leavebot.api.engine import build_router
+
+    results: List[Dict[str, Any]] = []
+    for extra in extra_intents:
+        router = build_router()
+        for i in range(extra):
+            router.register(f"synthetic_{i}", [f"topic {i} keyword"])
+        router.compile()
+        queries = iter(range(10 ** 9))
+        _result(results, "routing.match", {"intents": len(router.intents)},
+                measure(lambda: router.match(ROUTING_QUERIES[next(queries) % len(ROUTING_QUERIES)]), repeat=50, number=50))
+    return results
+
+
+SUITES = {
+    "retrieval": bench_retrieval,
+    "mapping": bench_mapping,
+    "helpers": bench_helpers,
+    "routing": bench_routing,
+}
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]" if params else result["name"]
+
+
+def primary_metric(result: Dict[str, Any]) -> Optional[str]:
+    """The lower-is-better number compared against baselines."""
+    for metric in ("median_us", "seconds"):
+        if metric in result:
+            return metric
+    return None
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float = 0.15) -> List[Dict[str, Any]]:
+    """
+    Compare results with a saved baseline. Each row has the ratio new / baseline of the
+    primary metric and a verdict: 'slower' / 'faster' beyond tolerance, else 'same'.
+    """
+    rows = []
+    for result in results:
+        base = baseline.get("results", {}).get(result_key(result))
+        metric = primary_metric(result)
+        if not base or metric not in base or not base[metric]:
+            continue
+        ratio = result[metric] / base[metric]
+        verdict = "slower" if ratio > 1 + tolerance else "faster" if ratio < 1 - tolerance else "same"
+        rows.append({"key": result_key(result), "metric": metric, "baseline": base[metric],
+                     "current": result[metric], "ratio": ratio, "verdict": verdict})
+    return rows
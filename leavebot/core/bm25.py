@@ -0,0 +1,89 @@
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
+
+from leavebot.core.search_embeddings import top_k_indices
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; short policy codes such as 'sl' or 'al' are kept."""
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Lexical inverted index with Okapi BM25 scoring over doc knowledge sections.
+    Document ids are row positions in the entry list it was built from, so they
+    line up with the rows of the matching dense index.
+    """
+
+    def __init__(
+        self,
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        doc_len: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        """
+        :param postings: term -> (doc ids, term frequencies)
+        :param doc_len: Token count of every document
+        """
+        self.postings = postings
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        n_docs = doc_len.shape[0]
+        self.avg_len = float(doc_len.mean()) if n_docs else 0.0
+        self.idf = {
+            term: float(np.log(1 + (n_docs - ids.size + 0.5) / (ids.size + 0.5)))
+            for term, (ids, _) in postings.items()
+        }
+
+    @classmethod
+    def from_entries(
+        cls,
+        entries: List[Dict[str, Any]],
+        fields: Sequence[str] = ("section", "text"),
+        **kwargs: Any,
+    ) -> "BM25Index":
+        ids: Dict[str, List[int]] = defaultdict(list)
+        tfs: Dict[str, List[int]] = defaultdict(list)
+        doc_len = np.zeros(len(entries), dtype=np.float32)
+        for doc_id, entry in enumerate(entries):
+            tokens = tokenize(" ".join(str(entry.get(field) or "") for field in fields))
+            doc_len[doc_id] = len(tokens)
+            for term, count in Counter(tokens).items():
+                ids[term].append(doc_id)
+                tfs[term].append(count)
+        postings = {
+            term: (np.asarray(ids[term], dtype=np.int64), np.asarray(tfs[term], dtype=np.float32))
+            for term in ids
+        }
+        return cls(postings, doc_len, **kwargs)
+
+    def __len__(self) -> int:
+        return self.doc_len.shape[0]
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query (0 where no term matches)."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / (self.avg_len or 1.0))
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            ids, tf = posting
+            scores[ids] += self.idf[term] * tf * (self.k1 + 1) / (tf + norm[ids])
+        return scores
+
+    def search(self, query: str, top_k: int) -> List[Tuple[float, int]]:
+        """Top_k (score, doc id) pairs with a non-zero score, best first."""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores)
+        if matched.size == 0 or top_k <= 0:
+            return []
+        top = matched[top_k_indices(scores[matched], top_k)]
+        return [(float(scores[i]), int(i)) for i in top]
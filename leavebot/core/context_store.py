@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_CONTEXT_DB = os.getenv("CONTEXT_STORE_PATH", "leavebot/data/contexts.sqlite3")
+# Mapped context(s) shipped with the repo, imported into an empty store by the app
+SEED_CONTEXT_PATH = os.getenv("CONTEXT_SEED_PATH", "leavebot/data/mapped_context.json")
+
+
+class ContextStore:
+    """
+    SQLite store of mapped employee contexts (build_full_context output), keyed by emp_id.
+    Lookups go through the primary key index; writes bump a store version counter
+    so readers can tell when their cached contexts are out of date.
+    """
+
+    def __init__(self, path: str = DEFAULT_CONTEXT_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS contexts ("
+                " emp_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            # Per-employee sync bookkeeping: hashes of the raw ERP payloads last mapped
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " emp_id TEXT PRIMARY KEY, fingerprint TEXT NOT NULL,"
+                " employee_hash TEXT, leave_types_hash TEXT, balances_hash TEXT,"
+                " last_synced REAL NOT NULL, last_changed REAL NOT NULL)"
+            )
+            # Reporting line and team-query facts per employee, kept in step with contexts.
+            # version = store version of the write, so readers can fetch only what changed.
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS reporting ("
+                " emp_id TEXT PRIMARY KEY, manager_id TEXT, facts TEXT,"
+                " version INTEGER NOT NULL, deleted INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_reporting_version ON reporting(version)")
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+            self._conn.commit()
+            backfill = (
+                self._conn.execute("SELECT COUNT(*) FROM reporting").fetchone()[0] == 0
+                and self._conn.execute("SELECT COUNT(*) FROM contexts").fetchone()[0] > 0
+            )
+        if backfill:
+            self.rebuild_reporting()
+
+    @staticmethod
+    def key_for(ctx: Dict[str, Any]) -> str:
+        emp_id = ctx.get("employee", {}).get("emp_id")
+        if emp_id is None or str(emp_id) == "":
+            raise ValueError("Context has no employee.emp_id")
+        return str(emp_id)
+
+    @staticmethod
+    def reporting_facts(ctx: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Manager id ('' and '0' mean none) and the facts team queries need."""
+        emp = ctx.get("employee", {})
+        manager_id = str(emp.get("manager_id") or "").strip()
+        facts = {
+            "name": emp.get("name"),
+            "probation_end": emp.get("probation_end"),
+            "balances": {code: b.get("balance", 0) for code, b in ctx.get("leave_balances", {}).items()},
+        }
+        return (manager_id if manager_id not in ("", "0") else None), facts
+
+    def get(self, emp_id) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM contexts WHERE emp_id = ?", (str(emp_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, ctx: Dict[str, Any]) -> None:
+        self.upsert_many([ctx])
+
+    def upsert_many(self, contexts: Iterable[Dict[str, Any]], batch_size: int = 1000) -> int:
+        """
+        Insert or replace many contexts, committing every batch_size rows.
+        Returns the number of contexts written.
+        """
+        written = 0
+        batch: List[tuple] = []
+        reporting: List[tuple] = []
+        for ctx in contexts:
+            key = self.key_for(ctx)
+            batch.append((key, json.dumps(ctx, ensure_ascii=False), time.time()))
+            manager_id, facts = self.reporting_facts(ctx)
+            reporting.append((key, manager_id, json.dumps(facts, ensure_ascii=False)))
+            if len(batch) >= batch_size:
+                written += self._write(batch, reporting)
+                batch, reporting = [], []
+        if batch:
+            written += self._write(batch, reporting)
+        return written
+
+    def _write(self, rows: List[tuple], reporting: List[tuple]) -> int:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO contexts (emp_id, data, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(emp_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                rows,
+            )
+            version = self._bump_version()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO reporting (emp_id, manager_id, facts, version, deleted) VALUES (?, ?, ?, ?, 0)",
+                [(*row, version) for row in reporting],
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def _bump_version(self) -> int:
+        self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def delete(self, emp_id) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM contexts WHERE emp_id = ?", (str(emp_id),))
+            # Forget the sync fingerprint too, so the next roster sync stores the employee again
+            self._conn.execute("DELETE FROM sync_state WHERE emp_id = ?", (str(emp_id),))
+            version = self._bump_version()
+            # Tombstone, so incremental readers of the reporting table see the removal
+            self._conn.execute(
+                "UPDATE reporting SET deleted = 1, version = ? WHERE emp_id = ?", (version, str(emp_id))
+            )
+            self._conn.commit()
+        return cur.rowcount > 0
+
+    def seed_if_empty(self, path: str = SEED_CONTEXT_PATH) -> int:
+        """
+        Import the contexts in path (JSON/JSONL) if the store has none yet, so a fresh
+        checkout answers for the shipped sample employee. Returns the number imported.
+        """
+        if not path or not os.path.exists(path) or len(self):
+            return 0
+        return self.upsert_many(load_contexts_file(path))
+
+    def reporting_since(self, version: int = 0) -> List[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]:
+        """
+        Reporting rows written after the given store version, as (emp_id, manager_id, facts);
+        facts is None for deleted employees.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT emp_id, manager_id, facts, deleted FROM reporting WHERE version > ? ORDER BY version",
+                (version,),
+            ).fetchall()
+        return [(emp_id, manager_id, None if deleted else json.loads(facts)) for emp_id, manager_id, facts, deleted in rows]
+
+    def rebuild_reporting(self) -> None:
+        """Recreate the reporting table from the stored contexts (for stores written before it existed)."""
+        rows = []
+        for ctx in self.iter_contexts():
+            manager_id, facts = self.reporting_facts(ctx)
+            rows.append((self.key_for(ctx), manager_id, json.dumps(facts, ensure_ascii=False)))
+        with self._lock:
+            version = self._bump_version()
+            self._conn.execute("DELETE FROM reporting")
+            self._conn.executemany(
+                "INSERT INTO reporting (emp_id, manager_id, facts, version, deleted) VALUES (?, ?, ?, ?, 0)",
+                [(*row, version) for row in rows],
+            )
+            self._conn.commit()
+
+    def get_fingerprints(self, emp_ids: Iterable) -> Dict[str, str]:
+        """Stored payload fingerprint per emp_id (employees never synced, or without a stored context, are absent)."""
+        keys = [str(e) for e in emp_ids]
+        found: Dict[str, str] = {}
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    "SELECT s.emp_id, s.fingerprint FROM sync_state s JOIN contexts c ON c.emp_id = s.emp_id"
+                    f" WHERE s.emp_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                found.update(rows)
+        return found
+
+    def record_sync(self, states: List[Dict[str, Any]]) -> None:
+        """
+        Save sync bookkeeping. Each state has emp_id, fingerprint, the per-payload
+        hashes and `changed`; last_changed only moves when the payload changed.
+        Does not bump the store version, since no context is rewritten.
+        """
+        now = time.time()
+        rows = [
+            (str(s["emp_id"]), s["fingerprint"], s.get("employee_hash"), s.get("leave_types_hash"),
+             s.get("balances_hash"), now, now, 1 if s.get("changed") else 0)
+            for s in states
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO sync_state (emp_id, fingerprint, employee_hash, leave_types_hash,"
+                " balances_hash, last_synced, last_changed) VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(emp_id) DO UPDATE SET fingerprint = excluded.fingerprint,"
+                " employee_hash = excluded.employee_hash, leave_types_hash = excluded.leave_types_hash,"
+                " balances_hash = excluded.balances_hash, last_synced = excluded.last_synced,"
+                " last_changed = CASE WHEN ?8 THEN excluded.last_changed ELSE sync_state.last_changed END",
+                rows,
+            )
+            self._conn.commit()
+
+    def get_sync_state(self, emp_id) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cur = self._conn.execute("SELECT * FROM sync_state WHERE emp_id = ?", (str(emp_id),))
+            row = cur.fetchone()
+            names = [d[0] for d in cur.description]
+        return dict(zip(names, row)) if row else None
+
+    def version(self) -> int:
+        """Counter incremented by every write; unchanged version means unchanged data."""
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def emp_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT emp_id FROM contexts ORDER BY emp_id")]
+
+    def iter_contexts(self) -> Iterator[Dict[str, Any]]:
+        """Stream every stored context (for roster-wide jobs)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM contexts ORDER BY emp_id").fetchall()
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM contexts").fetchone()[0]
+
+    def __contains__(self, emp_id) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM contexts WHERE emp_id = ?", (str(emp_id),)
+            ).fetchone() is not None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def load_contexts_file(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read mapped contexts from a JSON file (one context or a list of contexts)
+    or a JSONL file (one context per line).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+    yield from (data if isinstance(data, list) else [data])
+
+
+# Script usage: python -m leavebot.core.context_store import leavebot/data/mapped_context.json
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] != "import":
+        raise SystemExit("Usage: python -m leavebot.core.context_store import <contexts.json|contexts.jsonl>")
+    store = ContextStore()
+    count = store.upsert_many(load_contexts_file(sys.argv[2]))
+    print(f"Imported {count} contexts into {store.path} ({len(store)} employees stored)")
@@ -0,0 +1,204 @@
+import os
+import re
+import json
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Type
+import numpy as np
+
+from leavebot.core.search_embeddings import DocKnowledgeIndex, get_query_embeddings, normalize_rows
+from leavebot.core.embedding_store import (
+    DEFAULT_JSON_PATH,
+    DEFAULT_STORE_DIR,
+    file_token,
+    load_doc_index,
+    load_store,
+    read_sidecar,
+    remove_stale_files,
+    save_array,
+    save_store,
+    store_exists,
+    store_token,
+)
+from leavebot.core.ivf_index import DEFAULT_IVF_DIR, load_ivf_if_current
+
+# Selects the backend used by the app; see BACKENDS for the registered names
+DEFAULT_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+
+BACKENDS: Dict[str, Type["EmbeddingBackend"]] = {}
+
+
+def register_backend(name: str) -> Callable[[Type["EmbeddingBackend"]], Type["EmbeddingBackend"]]:
+    """Class decorator adding an embedding backend to the registry under `name`."""
+    def decorator(cls: Type["EmbeddingBackend"]) -> Type["EmbeddingBackend"]:
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def get_backend(name: Optional[str] = None, **kwargs: Any) -> "EmbeddingBackend":
+    """Instantiate a registered backend (defaults to EMBEDDING_BACKEND)."""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}'. Available: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[name](**kwargs)
+
+
+def load_sections(store_dir: str = DEFAULT_STORE_DIR, json_path: str = DEFAULT_JSON_PATH) -> List[Dict[str, Any]]:
+    """Section metadata (section/text) from the doc knowledge store, or the JSON file."""
+    if store_exists(store_dir):
+        return read_sidecar(store_dir)["sections"]
+    if os.path.exists(json_path):
+        with open(json_path, "r", encoding="utf-8") as f:
+            return [{k: v for k, v in entry.items() if k != "embedding"} for entry in json.load(f)]
+    return []
+
+
+class EmbeddingBackend:
+    """
+    Base class for embedding backends. Each backend embeds queries and keeps
+    its own index of the doc knowledge corpus in its own vector space.
+    """
+
+    name = ""
+    # True if build_index can index raw section text without precomputed embeddings
+    indexes_text = True
+
+    def __init__(self, index_dir: Optional[str] = None):
+        self.index_dir = index_dir or f"{DEFAULT_STORE_DIR}_{self.name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Single-query embedding, usable as search_doc_knowledge's embedding_fn."""
+        return self.embed([text])[0]
+
+    def build_index(self, sections: List[Dict[str, Any]]) -> DocKnowledgeIndex:
+        raise NotImplementedError
+
+    def save_index(self, index: DocKnowledgeIndex) -> str:
+        return save_store(index, self.index_dir, extra={"backend": self.name})
+
+    def index_version(self) -> str:
+        """
+        Token that changes whenever the files behind load_index change.
+        Cheap enough to compute on every request (file stats only).
+        """
+        if store_exists(self.index_dir):
+            return store_token(self.index_dir)
+        # Index is built on the fly from the doc knowledge sections
+        return f"{store_token(DEFAULT_STORE_DIR)}|{file_token(DEFAULT_JSON_PATH)}"
+
+    def load_index(self) -> DocKnowledgeIndex:
+        """Load the saved backend index, building it from the doc knowledge sections if missing."""
+        if store_exists(self.index_dir):
+            return load_store(self.index_dir)
+        return self.build_index(load_sections())
+
+
+@register_backend("openai")
+class OpenAIBackend(EmbeddingBackend):
+    """OpenAI embeddings; the index is the doc knowledge store itself."""
+
+    indexes_text = False
+
+    def __init__(self, index_dir: Optional[str] = None, model: str = "text-embedding-3-large"):
+        super().__init__(index_dir or DEFAULT_STORE_DIR)
+        self.model = model
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(get_query_embeddings(texts, model=self.model), dtype=np.float32)
+
+    def build_index(self, sections: List[Dict[str, Any]]) -> DocKnowledgeIndex:
+        # Sections must already carry OpenAI embeddings
+        return DocKnowledgeIndex.from_entries(sections)
+
+    def index_version(self) -> str:
+        return f"{store_token(self.index_dir)}|{store_token(DEFAULT_IVF_DIR)}|{file_token(DEFAULT_JSON_PATH)}"
+
+    def load_index(self):
+        # Large corpora: use the IVF index when one was built for this store version
+        ivf = load_ivf_if_current(store_dir=self.index_dir)
+        if ivf is not None:
+            return ivf
+        return load_doc_index(self.index_dir) or DocKnowledgeIndex.from_entries([])
+
+
+@register_backend("hashed_ngram")
+class HashedNgramBackend(EmbeddingBackend):
+    """
+    Offline TF-IDF over hashed character n-grams, implemented in NumPy.
+    No network access; a query is embedded in well under a millisecond.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, dim: int = 4096, ngram_range=(3, 5)):
+        super().__init__(index_dir)
+        self.dim = dim
+        self.ngram_range = tuple(ngram_range)
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def _counts(self, text: str) -> np.ndarray:
+        text = " " + re.sub(r"\s+", " ", text.lower()).strip() + " "
+        buckets = [
+            zlib.crc32(text[i:i + n].encode("utf-8")) % self.dim
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1)
+            for i in range(len(text) - n + 1)
+        ]
+        return np.bincount(np.asarray(buckets, dtype=np.int64), minlength=self.dim).astype(np.float32)
+
+    def _term_frequencies(self, texts: List[str]) -> np.ndarray:
+        tf = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tf[row] = self._counts(text)
+        # Sublinear tf damps repeated n-grams in long sections
+        np.log1p(tf, out=tf)
+        return tf
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return normalize_rows(self._term_frequencies(texts) * self.idf)
+
+    @staticmethod
+    def section_text(section: Dict[str, Any]) -> str:
+        return f"{section.get('section', '')} {section.get('text', '')}"
+
+    def build_index(self, sections: List[Dict[str, Any]]) -> DocKnowledgeIndex:
+        sections = [{k: v for k, v in s.items() if k != "embedding"} for s in sections]
+        if not sections:
+            return DocKnowledgeIndex.from_entries([])
+        tf = self._term_frequencies([self.section_text(s) for s in sections])
+        df = np.count_nonzero(tf, axis=0)
+        self.idf = (np.log((1 + len(sections)) / (1 + df)) + 1).astype(np.float32)
+        return DocKnowledgeIndex(normalize_rows(tf * self.idf), sections)
+
+    def save_index(self, index: DocKnowledgeIndex) -> str:
+        # The IDF vector is versioned with the matrix: written first, named in the sidecar
+        idf_file = save_array(self.index_dir, "idf", self.idf.astype(np.float32))
+        version = save_store(index, self.index_dir, extra={
+            "backend": self.name, "dim": self.dim, "ngram_range": list(self.ngram_range), "idf_file": idf_file,
+        })
+        remove_stale_files(self.index_dir, "idf", idf_file)
+        return version
+
+    def load_index(self) -> DocKnowledgeIndex:
+        if store_exists(self.index_dir):
+            sidecar = read_sidecar(self.index_dir)
+            self.dim = sidecar.get("dim") or self.dim
+            self.ngram_range = tuple(sidecar.get("ngram_range", self.ngram_range))
+            # Stores written before idf_file was recorded keep an unversioned idf.npy
+            self.idf = np.load(os.path.join(self.index_dir, sidecar.get("idf_file", "idf.npy")))
+            return load_store(self.index_dir)
+        return self.build_index(load_sections())
+
+
+# Script usage: python -m leavebot.core.embedding_backends hashed_ngram
+# Builds and saves the named backend's index from the doc knowledge sections.
+if __name__ == "__main__":
+    import sys
+
+    backend = get_backend(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not backend.indexes_text:
+        raise SystemExit(f"The '{backend.name}' index is the doc knowledge store; build it with leavebot.core.embedding_store.")
+    index = backend.build_index(load_sections())
+    version = backend.save_index(index)
+    print(f"Built '{backend.name}' index with {len(index)} sections in {backend.index_dir} (version {version})")
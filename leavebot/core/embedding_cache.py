@@ -0,0 +1,186 @@
+import os
+import time
+import atexit
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "leavebot/data/embedding_cache.sqlite3")
+DEFAULT_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", 30 * 24 * 3600))  # seconds
+EVICT_EVERY = 100  # disk size check runs once per this many writes
+TOUCH_FLUSH_EVERY = 100  # hits whose last_used update is batched into one write
+
+
+def normalize_query(text: str) -> str:
+    """Cache key normalization: case-folded, whitespace collapsed."""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings, keyed by (model, normalized query text).
+    Tier 1 is an in-process LRU, tier 2 an optional persistent SQLite file.
+    Both tiers honour the same TTL; each tier is bounded by its own item count.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        max_memory_items: int = 2048,
+        max_disk_items: int = 200_000,
+        ttl_seconds: float = DEFAULT_TTL,
+    ):
+        """
+        :param path: SQLite file for the disk tier; None or "" keeps the cache in memory only
+        :param max_memory_items: LRU capacity of the in-process tier
+        :param max_disk_items: Row limit of the disk tier (least recently used rows evicted)
+        :param ttl_seconds: Entries older than this are treated as misses and dropped
+        """
+        self.path = path or None
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        # last_used of hits (memory or disk) not yet written back: read hits do not each
+        # cost a commit, and eviction by last_used still sees the hot queries
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self._conn = None
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, query TEXT NOT NULL, embedding BLOB NOT NULL,"
+                " created_at REAL NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, query))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+            self._conn.commit()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = (model, normalize_query(text))
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                vec, created_at = item
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._touch(key, now)
+                    self.hits_memory += 1
+                    return vec.tolist()
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT embedding, created_at FROM embeddings WHERE model = ? AND query = ?", key
+                ).fetchone()
+                if row is not None:
+                    if now - row[1] <= self.ttl_seconds:
+                        self._touch(key, now)
+                        vec = np.frombuffer(row[0], dtype=np.float32)
+                        self._remember(key, vec, row[1])
+                        self.hits_disk += 1
+                        return vec.tolist()
+                    self._conn.execute("DELETE FROM embeddings WHERE model = ? AND query = ?", key)
+                    self._conn.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, model: str, text: str, embedding: List[float]) -> None:
+        key = (model, normalize_query(text))
+        now = time.time()
+        vec = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vec, now)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (model, query, embedding, created_at, last_used)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (*key, vec.tobytes(), now, now),
+                )
+                self._writes += 1
+                self._flush_touched()
+                if self._writes % EVICT_EVERY == 0:
+                    self._evict_disk(now)
+                self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.commit()
+
+    def close(self) -> None:
+        """Write pending last_used updates and close the disk tier (memory tier keeps working)."""
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touched()
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "memory_items": len(self._memory),
+        }
+
+    def _remember(self, key: Tuple[str, str], vec: np.ndarray, created_at: float) -> None:
+        self._memory[key] = (vec, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key: Tuple[str, str], now: float) -> None:
+        if self._conn is None:
+            return
+        self._touched[key] = now
+        if len(self._touched) >= TOUCH_FLUSH_EVERY:
+            self._flush_touched()
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        """Write pending last_used updates (caller holds the lock and commits)."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND query = ?",
+                [(ts, *key) for key, ts in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict_disk(self, now: float) -> None:
+        self._conn.execute("DELETE FROM embeddings WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count > self.max_disk_items:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN ("
+                " SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (count - self.max_disk_items,),
+            )
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> EmbeddingCache:
+    """Process-wide cache used by get_query_embedding unless another one is passed."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+            atexit.register(_default_cache.close)
+        return _default_cache
@@ -0,0 +1,172 @@
+import os
+import json
+import glob
+import hashlib
+import tempfile
+from typing import List, Dict, Any, Optional, Union
+import numpy as np
+
+from leavebot.core.search_embeddings import DocKnowledgeIndex
+
+DEFAULT_JSON_PATH = "leavebot/data/combined_doc_knowledge.json"
+DEFAULT_STORE_DIR = "leavebot/data/doc_knowledge"
+SIDECAR_NAME = "sections.json"
+
+# On-disk layout of a store directory:
+#   embeddings-<version>.npy  raw float32 (n_sections, dim) matrix, rows L2-normalized
+#   sections.json             sidecar: version, embeddings file name and section metadata
+# The sidecar is replaced last, so readers always see a complete version.
+# Extra arrays (e.g. a backend's IDF vector) follow the same scheme via save_array:
+# <prefix>-<content hash>.npy, named in the sidecar and cleaned up after it is replaced.
+
+
+def _atomic_write(path: str, write_fn) -> None:
+    """Write a file via a temp file in the same directory and os.replace it into place."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write_fn(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_array(store_dir: str, prefix: str, array: np.ndarray) -> str:
+    """
+    Write an auxiliary array as <prefix>-<content hash>.npy (atomically) and return its
+    file name, to be recorded in the sidecar through save_store's `extra`.
+    """
+    array = np.ascontiguousarray(array)
+    file_name = f"{prefix}-{hashlib.sha256(array.tobytes()).hexdigest()[:16]}.npy"
+    os.makedirs(store_dir, exist_ok=True)
+    _atomic_write(os.path.join(store_dir, file_name), lambda f: np.save(f, array))
+    return file_name
+
+
+def remove_stale_files(store_dir: str, prefix: str, keep: str) -> None:
+    """Delete <prefix>-*.npy files other than keep (may still be mapped elsewhere on Windows)."""
+    for old in glob.glob(os.path.join(store_dir, f"{prefix}-*.npy")):
+        if os.path.basename(old) != keep:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def save_store(
+    doc_knowledge: Union[DocKnowledgeIndex, List[Dict[str, Any]]],
+    store_dir: str = DEFAULT_STORE_DIR,
+    extra: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Write doc knowledge as a memory-mappable embedding matrix plus a metadata sidecar.
+    Returns the version string of the written store.
+    """
+    if not isinstance(doc_knowledge, DocKnowledgeIndex):
+        doc_knowledge = DocKnowledgeIndex.from_entries(doc_knowledge)
+    matrix = np.ascontiguousarray(doc_knowledge.matrix, dtype=np.float32)
+    sections = [
+        {k: v for k, v in entry.items() if k != "embedding"}
+        for entry in doc_knowledge.entries
+    ]
+    version = hashlib.sha256(matrix.tobytes()).hexdigest()[:16]
+    embeddings_file = f"embeddings-{version}.npy"
+
+    os.makedirs(store_dir, exist_ok=True)
+    _atomic_write(os.path.join(store_dir, embeddings_file), lambda f: np.save(f, matrix))
+    sidecar = {
+        "version": version,
+        "embeddings_file": embeddings_file,
+        "count": int(matrix.shape[0]),
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "sections": sections,
+    }
+    if extra:
+        sidecar.update(extra)
+    _atomic_write(
+        os.path.join(store_dir, SIDECAR_NAME),
+        lambda f: f.write(json.dumps(sidecar, ensure_ascii=False).encode("utf-8")),
+    )
+
+    # Drop matrices from older versions
+    remove_stale_files(store_dir, "embeddings", embeddings_file)
+    return version
+
+
+def read_sidecar(store_dir: str = DEFAULT_STORE_DIR) -> Dict[str, Any]:
+    with open(os.path.join(store_dir, SIDECAR_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_store(store_dir: str = DEFAULT_STORE_DIR) -> DocKnowledgeIndex:
+    """
+    Open a store as a DocKnowledgeIndex. The embedding matrix is memory-mapped
+    read-only, so loading is near-instant and pages are read lazily on search.
+    """
+    sidecar = read_sidecar(store_dir)
+    if not sidecar["sections"]:
+        return DocKnowledgeIndex.from_entries([])
+    matrix = np.load(os.path.join(store_dir, sidecar["embeddings_file"]), mmap_mode="r")
+    return DocKnowledgeIndex(matrix, sidecar["sections"])
+
+
+def file_token(path: str) -> str:
+    """Cheap change token for a file (mtime + size), '' if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def store_token(store_dir: str = DEFAULT_STORE_DIR) -> str:
+    """
+    Change token for a store without parsing it. The sidecar is replaced on
+    every save, so its stat changes whenever a new version is written.
+    """
+    return file_token(os.path.join(store_dir, SIDECAR_NAME))
+
+
+def store_exists(store_dir: str = DEFAULT_STORE_DIR) -> bool:
+    return os.path.exists(os.path.join(store_dir, SIDECAR_NAME))
+
+
+def convert_json_to_store(json_path: str = DEFAULT_JSON_PATH, store_dir: str = DEFAULT_STORE_DIR) -> str:
+    """
+    Convert a combined_doc_knowledge.json file (embeddings as JSON float lists)
+    into the binary store format. Returns the store version.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        doc_knowledge = json.load(f)
+    return save_store(doc_knowledge, store_dir)
+
+
+def load_doc_index(
+    store_dir: str = DEFAULT_STORE_DIR,
+    json_path: str = DEFAULT_JSON_PATH,
+) -> Optional[DocKnowledgeIndex]:
+    """
+    Load doc knowledge, preferring the binary store and falling back to the JSON file.
+    Returns None if neither exists.
+    """
+    if store_exists(store_dir):
+        return load_store(store_dir)
+    if os.path.exists(json_path):
+        with open(json_path, "r", encoding="utf-8") as f:
+            return DocKnowledgeIndex.from_entries(json.load(f))
+    return None
+
+
+# Script usage: python -m leavebot.core.embedding_store [json_path] [store_dir]
+if __name__ == "__main__":
+    import sys
+
+    src = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_JSON_PATH
+    dst = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_STORE_DIR
+    if not os.path.exists(src):
+        raise FileNotFoundError(f"Doc knowledge file not found: {src}")
+    version = convert_json_to_store(src, dst)
+    print(f"Converted {src} -> {dst} (version {version})")
@@ -0,0 +1,162 @@
+import os
+import re
+import hashlib
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+import openai
+
+from leavebot.core.search_embeddings import DocKnowledgeIndex, normalize_rows
+from leavebot.core.embedding_store import DEFAULT_STORE_DIR, load_store, read_sidecar, save_store, store_exists
+
+DEFAULT_SOURCE_DIR = "leavebot/data/policies"
+DEFAULT_MODEL = "text-embedding-3-large"
+SOURCE_EXTENSIONS = (".txt", ".md")
+HEADING_RE = re.compile(r"^\s*#{1,6}\s+(.+?)\s*#*\s*$")
+
+
+def chunk_document(title: str, text: str, max_chars: int = 1500) -> Iterator[Dict[str, str]]:
+    """
+    Split one policy document into sections at markdown headings.
+    Sections longer than max_chars are split further on paragraph boundaries.
+    """
+    heading = title
+    lines: List[str] = []
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if not body:
+            return
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", body) if p.strip()]
+        parts, current = [], ""
+        for para in paragraphs:
+            if current and len(current) + len(para) + 2 > max_chars:
+                parts.append(current)
+                current = para
+            else:
+                current = f"{current}\n\n{para}" if current else para
+        parts.append(current)
+        for i, part in enumerate(parts):
+            name = heading if len(parts) == 1 else f"{heading} ({i + 1}/{len(parts)})"
+            yield {"section": name, "text": part}
+
+    for line in text.splitlines():
+        match = HEADING_RE.match(line)
+        if match:
+            yield from flush()
+            heading = f"{title} > {match.group(1)}" if match.group(1) != title else title
+            lines = []
+        else:
+            lines.append(line)
+    yield from flush()
+
+
+def chunk_sources(source_dir: str = DEFAULT_SOURCE_DIR, max_chars: int = 1500) -> List[Dict[str, Any]]:
+    """Chunk every .txt/.md document under source_dir, in a stable (sorted path) order."""
+    chunks = []
+    for root, _, files in sorted(os.walk(source_dir)):
+        for name in sorted(files):
+            if not name.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            title = os.path.splitext(name)[0].replace("_", " ").strip()
+            for chunk in chunk_document(title, text, max_chars):
+                chunk["source"] = os.path.relpath(path, source_dir).replace(os.sep, "/")
+                chunk["hash"] = content_hash(chunk)
+                chunks.append(chunk)
+    return chunks
+
+
+def content_hash(chunk: Dict[str, Any]) -> str:
+    return hashlib.sha256(f"{chunk['section']}\n{chunk['text']}".encode("utf-8")).hexdigest()
+
+
+def embed_documents(texts: List[str], model: str = DEFAULT_MODEL) -> List[List[float]]:
+    """One embeddings.create call for a batch of section texts."""
+    if not os.getenv("OPENAI_API_KEY"):
+        raise RuntimeError("OPENAI_API_KEY not set in environment or .env file.")
+    response = openai.embeddings.create(input=texts, model=model)
+    return [item.embedding for item in response.data]
+
+
+def build_index(
+    source_dir: str = DEFAULT_SOURCE_DIR,
+    store_dir: str = DEFAULT_STORE_DIR,
+    model: str = DEFAULT_MODEL,
+    batch_size: int = 100,
+    max_chars: int = 1500,
+    embed_fn: Optional[Callable[[List[str], str], List[List[float]]]] = None,
+) -> Dict[str, Any]:
+    """
+    Incrementally (re)build the doc knowledge store from source documents.
+    Chunks whose content hash is already in the store reuse their stored embedding;
+    only new or changed chunks are embedded, batch_size texts per API call.
+    Chunks no longer present in the sources are dropped. Returns run statistics.
+    """
+    embed_fn = embed_fn or embed_documents
+    chunks = chunk_sources(source_dir, max_chars)
+
+    known: Dict[str, np.ndarray] = {}
+    old_hashes: List[str] = []
+    dim = 0
+    sidecar = read_sidecar(store_dir) if store_exists(store_dir) else {}
+    if sidecar.get("model") == model:
+        dim = int(sidecar.get("dim", 0))
+        existing = load_store(store_dir)
+        old_hashes = [entry.get("hash", "") for entry in existing.entries]
+        for row, h in enumerate(old_hashes):
+            if h:
+                known[h] = existing.matrix[row]
+
+    pending = list(dict.fromkeys(c["hash"] for c in chunks if c["hash"] not in known))
+    pending_set = set(pending)
+    text_for = {c["hash"]: f"{c['section']}\n{c['text']}" for c in chunks}
+    api_calls = 0
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        for h, embedding in zip(batch, embed_fn([text_for[h] for h in batch], model)):
+            known[h] = np.asarray(embedding, dtype=np.float32)
+        api_calls += 1
+
+    new_hashes = [c["hash"] for c in chunks]
+    stats = {
+        "chunks": len(chunks),
+        "embedded": len(pending),
+        "reused": len(chunks) - sum(1 for c in chunks if c["hash"] in pending_set),
+        "dropped": len(set(old_hashes) - set(new_hashes)),
+        "api_calls": api_calls,
+        "written": False,
+    }
+    if new_hashes == old_hashes:
+        return stats  # Unchanged corpus: nothing to embed or write
+
+    if chunks:
+        matrix = np.array([known[c["hash"]] for c in chunks], dtype=np.float32).reshape(len(chunks), -1)
+    else:
+        # Every source was removed: write an empty store, keeping the old dimension
+        matrix = np.zeros((0, dim), dtype=np.float32)
+    index = DocKnowledgeIndex(normalize_rows(matrix), chunks)
+    stats["version"] = save_store(index, store_dir, extra={"model": model})
+    stats["written"] = True
+    return stats
+
+
+# Script usage: python -m leavebot.core.indexer [source_dir] [store_dir]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chunk policy documents and update the doc knowledge store.")
+    parser.add_argument("source_dir", nargs="?", default=DEFAULT_SOURCE_DIR)
+    parser.add_argument("store_dir", nargs="?", default=DEFAULT_STORE_DIR)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--max-chars", type=int, default=1500)
+    args = parser.parse_args()
+
+    stats = build_index(args.source_dir, args.store_dir, args.model, args.batch_size, args.max_chars)
+    print(
+        f"{stats['chunks']} chunks: {stats['embedded']} embedded ({stats['api_calls']} API calls), "
+        f"{stats['reused']} reused, {stats['dropped']} dropped"
+        + (f" -> {args.store_dir} (version {stats['version']})" if stats["written"] else "; store unchanged")
+    )
@@ -0,0 +1,172 @@
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class Intent:
+    """A named intent, the phrases that trigger it and the handler that answers it."""
+
+    __slots__ = ("name", "phrases", "handler", "priority", "order")
+
+    def __init__(self, name: str, phrases: Tuple[str, ...], handler: Optional[Callable], priority: int, order: int):
+        self.name = name
+        self.phrases = phrases
+        self.handler = handler
+        self.priority = priority
+        self.order = order
+
+    def __repr__(self) -> str:
+        return f"Intent({self.name!r}, priority={self.priority})"
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a set of phrases. One left-to-right pass over the
+    text reports every phrase occurrence (overlapping ones included), so matching
+    cost depends on the text length, not on how many phrases are registered.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        # goto[state] maps a character to the next state; out[state] lists phrase ids ending there
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+        self.phrases: List[str] = []
+        for phrase in phrases:
+            self._add(phrase)
+        self._build_links()
+
+    def _add(self, phrase: str) -> None:
+        state = 0
+        for ch in phrase:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append(len(self.phrases))
+        self.phrases.append(phrase)
+
+    def _build_links(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                # Inherit the outputs of the longest proper suffix that is also a phrase
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, int]]:
+        """Return (end_position, phrase_id) for every phrase occurrence in text."""
+        goto, fail, out = self.goto, self.fail, self.out
+        hits = []
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                hits.extend((pos, pid) for pid in out[state])
+        return hits
+
+
+class IntentRouter:
+    """
+    Registry of keyword intents. Handlers declare their trigger phrases; all phrases
+    compile into one PhraseMatcher, and a query is routed in a single pass.
+    Phrases match as case-insensitive substrings. When several intents match, the
+    highest priority wins, ties going to the intent registered first.
+    """
+
+    def __init__(self):
+        self.intents: Dict[str, Intent] = {}
+        self._matcher: Optional[PhraseMatcher] = None
+        self._phrase_intents: List[Intent] = []
+
+    def register(self, name: str, phrases: Iterable[str], handler: Optional[Callable] = None, priority: int = 0) -> Intent:
+        phrases = tuple(p.lower() for p in phrases if p)
+        if not phrases:
+            raise ValueError(f"Intent '{name}' needs at least one trigger phrase")
+        if name in self.intents:
+            raise ValueError(f"Intent '{name}' is already registered")
+        intent = Intent(name, phrases, handler, priority, len(self.intents))
+        self.intents[name] = intent
+        self._matcher = None  # Recompiled lazily on the next match
+        return intent
+
+    def intent(self, name: str, phrases: Iterable[str], priority: int = 0):
+        """Decorator form of register: @router.intent("shift", ["shift"])"""
+        def decorator(handler: Callable) -> Callable:
+            self.register(name, phrases, handler, priority)
+            return handler
+        return decorator
+
+    def compile(self) -> None:
+        self._phrase_intents = [intent for intent in self.intents.values() for _ in intent.phrases]
+        self._matcher = PhraseMatcher(p for intent in self.intents.values() for p in intent.phrases)
+
+    def match_all(self, query: str) -> List[Intent]:
+        """Every intent triggered by the query, best first."""
+        if self._matcher is None:
+            self.compile()
+        found = {id(self._phrase_intents[pid]): self._phrase_intents[pid] for _, pid in self._matcher.find(query.lower())}
+        return sorted(found.values(), key=lambda i: (-i.priority, i.order))
+
+    def match(self, query: str) -> Optional[Intent]:
+        """The winning intent for the query, or None if no phrase matched."""
+        matches = self.match_all(query)
+        return matches[0] if matches else None
+
+    def dispatch(self, query: str, *args, **kwargs) -> Tuple[Optional[Intent], Any]:
+        """Match the query and call the winning handler with args; (None, None) if nothing matched."""
+        intent = self.match(query)
+        if intent is None or intent.handler is None:
+            return intent, None
+        return intent, intent.handler(*args, **kwargs)
+
+
+def benchmark(intent_counts: Iterable[int] = (10, 100, 1000, 5000), repeats: int = 2000) -> List[Dict[str, float]]:
+    """
+    Routing cost per query for a growing number of synthetic intents: the router
+    versus an if/elif chain of `in` checks (as main.py used to do).
+    The query matches nothing, the worst case for the chain.
+    """
+    import time
+
+    query = "how many days of annual leave can i carry over into next year?"
+    rows = []
+    for n in intent_counts:
+        phrases = [f"topic {i} keyword" for i in range(n)]
+        router = IntentRouter()
+        for i, phrase in enumerate(phrases):
+            router.register(f"intent_{i}", [phrase, f"alias {i}"])
+        router.compile()
+
+        t = time.perf_counter()
+        for _ in range(repeats):
+            router.match(query)
+        router_us = (time.perf_counter() - t) / repeats * 1e6
+
+        aliases = [(p, f"alias {i}") for i, p in enumerate(phrases)]
+        t = time.perf_counter()
+        for _ in range(repeats):
+            lower_q = query.lower()
+            for phrase, alias in aliases:
+                if phrase in lower_q or alias in lower_q:
+                    break
+        chain_us = (time.perf_counter() - t) / repeats * 1e6
+        rows.append({"intents": n, "router_us": router_us, "chain_us": chain_us})
+    return rows
+
+
+# Script usage: python -m leavebot.core.intent_router (routing micro-benchmark)
+if __name__ == "__main__":
+    print(f"{'intents':>8} {'router us/query':>16} {'if/elif us/query':>17}")
+    for row in benchmark():
+        print(f"{row['intents']:>8} {row['router_us']:>16.1f} {row['chain_us']:>17.1f}")
@@ -0,0 +1,298 @@
+import os
+import time
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from leavebot.core.search_embeddings import DocKnowledgeIndex, normalize_rows, top_k_indices
+from leavebot.core.embedding_store import (
+    DEFAULT_STORE_DIR,
+    read_sidecar,
+    remove_stale_files,
+    save_array,
+    save_store,
+    store_exists,
+)
+
+DEFAULT_IVF_DIR = "leavebot/data/doc_knowledge_ivf"
+DEFAULT_NPROBE = int(os.getenv("IVF_NPROBE", 8))
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    n_iter: int = 20,
+    seed: int = 0,
+    chunk_size: int = 65536,
+) -> np.ndarray:
+    """
+    K-means on L2-normalized vectors using cosine similarity (centroids kept unit length).
+    Returns the (n_clusters, dim) float32 centroid matrix.
+    """
+    rng = np.random.default_rng(seed)
+    n = vectors.shape[0]
+    centroids = np.array(vectors[rng.choice(n, size=n_clusters, replace=False)], dtype=np.float32)
+    for _ in range(n_iter):
+        assign = assign_clusters(vectors, centroids, chunk_size)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=n_clusters)
+        # Re-seed empty clusters with random points so every list is used
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            sums[empty] = vectors[rng.choice(n, size=empty.size, replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def assign_clusters(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """Nearest centroid (by dot product) for every row, computed in chunks to bound memory."""
+    assign = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], chunk_size):
+        block = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        assign[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest-neighbour index over doc knowledge.
+    A k-means coarse quantizer splits the sections into n_lists clusters; rows are
+    stored grouped by cluster, so each inverted list is a contiguous slice of the
+    matrix. A query scores only the nprobe lists whose centroids are closest.
+    Exposes the same search/search_batch interface as DocKnowledgeIndex.
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        entries: List[Dict[str, Any]],
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        nprobe: int = DEFAULT_NPROBE,
+    ):
+        """
+        :param matrix: Normalized section embeddings, rows grouped by inverted list
+        :param entries: Section dicts aligned with the matrix rows
+        :param centroids: (n_lists, dim) unit-length centroids
+        :param offsets: n_lists + 1 row offsets; list c is matrix[offsets[c]:offsets[c + 1]]
+        :param nprobe: Number of inverted lists scanned per query
+        """
+        self.matrix = matrix
+        self.entries = entries
+        self.centroids = centroids
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(
+        cls,
+        base: DocKnowledgeIndex,
+        n_lists: Optional[int] = None,
+        n_iter: int = 20,
+        train_size: int = 100_000,
+        seed: int = 0,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> "IVFIndex":
+        """
+        Train the coarse quantizer on a sample of the base index and bucket every section.
+        n_lists defaults to about 4 * sqrt(n_sections).
+        """
+        n = len(base)
+        if n == 0:
+            return cls(base.matrix, [], np.zeros((0, 0), dtype=np.float32), np.zeros(1, dtype=np.int64), nprobe)
+        n_lists = min(n, n_lists or max(1, int(4 * np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(n, size=min(n, max(train_size, n_lists)), replace=False))
+        centroids = spherical_kmeans(np.asarray(base.matrix[sample], dtype=np.float32), n_lists, n_iter, seed)
+
+        assign = assign_clusters(base.matrix, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=n_lists), out=offsets[1:])
+        matrix = np.ascontiguousarray(base.matrix[order], dtype=np.float32)
+        entries = [base.entries[i] for i in order]
+        return cls(matrix, entries, centroids, offsets, nprobe)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _probe(self, query: np.ndarray, lists: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Scores and row ids of every section in the given inverted lists."""
+        spans = [(self.offsets[c], self.offsets[c + 1]) for c in lists]
+        scores = np.concatenate([self.matrix[a:b] @ query for a, b in spans])
+        rows = np.concatenate([np.arange(a, b) for a, b in spans])
+        return scores, rows
+
+    def search(self, query_emb: np.ndarray, top_k: int, nprobe: Optional[int] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Return approximately the top_k (score, entry) pairs by cosine similarity, best first.
+        """
+        if not self.entries or top_k <= 0:
+            return []
+        query = np.asarray(query_emb, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return [(0.0, entry) for entry in self.entries[:top_k]]
+        query = query / norm
+        lists = top_k_indices(self.centroids @ query, min(nprobe or self.nprobe, self.centroids.shape[0]))
+        scores, rows = self._probe(query, lists)
+        top = top_k_indices(scores, top_k)
+        return [(float(scores[i]), self.entries[rows[i]]) for i in top]
+
+    def search_batch(
+        self, query_embs: np.ndarray, top_k: int, nprobe: Optional[int] = None
+    ) -> List[List[Tuple[float, Dict[str, Any]]]]:
+        """
+        Score all queries against the centroids with one matrix-matrix product and pick
+        each query's nprobe lists in one argpartition; then rerank each query's lists.
+        Returns one best-first list of (score, entry) pairs per query row.
+        """
+        queries = np.array(query_embs, dtype=np.float32, ndmin=2)
+        if not self.entries or top_k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+        zero = np.linalg.norm(queries, axis=1) == 0
+        queries = normalize_rows(queries)
+        n_lists = self.centroids.shape[0]
+        nprobe = min(nprobe or self.nprobe, n_lists)
+        centroid_scores = queries @ self.centroids.T
+        if nprobe < n_lists:
+            probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(n_lists), centroid_scores.shape)
+
+        results = []
+        for query, lists, is_zero in zip(queries, probes, zero):
+            if is_zero:
+                results.append([(0.0, entry) for entry in self.entries[:top_k]])
+                continue
+            scores, rows = self._probe(query, lists)
+            top = top_k_indices(scores, top_k)
+            results.append([(float(scores[i]), self.entries[rows[i]]) for i in top])
+        return results
+
+    def save(self, ivf_dir: str = DEFAULT_IVF_DIR, source_version: str = "") -> str:
+        """
+        Save as a doc knowledge store (rows in list order) plus centroids and list offsets.
+        Centroids and offsets are versioned files named in the sidecar, so readers never
+        pair them with another version's list-ordered matrix.
+        """
+        centroids_file = save_array(ivf_dir, "centroids", self.centroids)
+        offsets_file = save_array(ivf_dir, "offsets", self.offsets)
+        version = save_store(
+            DocKnowledgeIndex(self.matrix, self.entries),
+            ivf_dir,
+            extra={
+                "index": "ivf",
+                "n_lists": int(self.centroids.shape[0]),
+                "source_version": source_version,
+                "centroids_file": centroids_file,
+                "offsets_file": offsets_file,
+            },
+        )
+        remove_stale_files(ivf_dir, "centroids", centroids_file)
+        remove_stale_files(ivf_dir, "offsets", offsets_file)
+        return version
+
+    @classmethod
+    def load(cls, ivf_dir: str = DEFAULT_IVF_DIR, nprobe: int = DEFAULT_NPROBE) -> "IVFIndex":
+        """Open a saved IVF index; the section matrix is memory-mapped like the plain store."""
+        # Every file comes from one sidecar read, so all parts belong to the same version
+        sidecar = read_sidecar(ivf_dir)
+        centroids = np.load(os.path.join(ivf_dir, sidecar.get("centroids_file", "centroids.npy")))
+        offsets = np.load(os.path.join(ivf_dir, sidecar.get("offsets_file", "offsets.npy")))
+        if not sidecar["sections"]:
+            return cls(np.zeros((0, 0), dtype=np.float32), [], centroids, offsets, nprobe)
+        matrix = np.load(os.path.join(ivf_dir, sidecar["embeddings_file"]), mmap_mode="r")
+        return cls(matrix, sidecar["sections"], centroids, offsets, nprobe)
+
+
+def load_ivf_if_current(
+    ivf_dir: str = DEFAULT_IVF_DIR,
+    store_dir: str = DEFAULT_STORE_DIR,
+    nprobe: int = DEFAULT_NPROBE,
+) -> Optional[IVFIndex]:
+    """
+    Load the IVF index if one was built from the current doc knowledge store version.
+    Returns None (caller falls back to brute force) if it is missing or stale.
+    """
+    if not store_exists(ivf_dir) or not store_exists(store_dir):
+        return None
+    source_version = read_sidecar(ivf_dir).get("source_version")
+    if source_version != read_sidecar(store_dir)["version"]:
+        logging.warning(f"IVF index in {ivf_dir} is stale (built from {source_version}); using brute-force search.")
+        return None
+    return IVFIndex.load(ivf_dir, nprobe)
+
+
+def recall_report(
+    ivf: IVFIndex,
+    base: DocKnowledgeIndex,
+    queries: np.ndarray,
+    top_k: int = 10,
+    nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32, 64),
+) -> List[Dict[str, float]]:
+    """
+    Compare IVF results with brute-force search for each nprobe setting.
+    Reports recall@top_k and mean per-query latency for both.
+    """
+    exact_ids = []
+    start = time.perf_counter()
+    for query in queries:
+        exact_ids.append({id(entry) for _, entry in base.search(query, top_k)})
+    brute_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    report = []
+    for nprobe in nprobes:
+        if nprobe > ivf.centroids.shape[0]:
+            break
+        hits = 0
+        start = time.perf_counter()
+        approx = [ivf.search(query, top_k, nprobe=nprobe) for query in queries]
+        ivf_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        for exact, found in zip(exact_ids, approx):
+            hits += len(exact & {id(entry) for _, entry in found})
+        report.append({
+            "nprobe": nprobe,
+            "recall": hits / (len(queries) * top_k),
+            "ivf_ms": ivf_ms,
+            "brute_ms": brute_ms,
+            "speedup": brute_ms / ivf_ms if ivf_ms else 0.0,
+        })
+    return report
+
+
+# Script usage:
+#   python -m leavebot.core.ivf_index build [--n-lists N]
+#   python -m leavebot.core.ivf_index report [--queries 200] [--top-k 10]
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or evaluate the IVF doc knowledge index.")
+    parser.add_argument("command", choices=["build", "report"])
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR, help="Source doc knowledge store")
+    parser.add_argument("--out", default=DEFAULT_IVF_DIR, help="IVF index directory")
+    parser.add_argument("--n-lists", type=int, default=None)
+    parser.add_argument("--queries", type=int, default=200, help="Sampled sections used as report queries")
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    base = load_store(args.store)
+    if args.command == "build":
+        start = time.perf_counter()
+        ivf = IVFIndex.build(base, n_lists=args.n_lists)
+        version = ivf.save(args.out, source_version=read_sidecar(args.store)["version"])
+        print(f"Built IVF index: {len(ivf)} sections, {ivf.centroids.shape[0]} lists "
+              f"in {time.perf_counter() - start:.1f}s -> {args.out} (version {version})")
+    else:
+        ivf = IVFIndex.load(args.out)
+        # Perturbed corpus rows stand in for real questions
+        rng = np.random.default_rng(0)
+        picks = rng.choice(len(base), size=min(args.queries, len(base)), replace=False)
+        queries = np.asarray(base.matrix[picks], dtype=np.float32)
+        queries += rng.normal(scale=0.5 / np.sqrt(queries.shape[1]), size=queries.shape).astype(np.float32)
+        # Recall is matched on section identity, so compare against the IVF's own entries
+        brute = DocKnowledgeIndex(ivf.matrix, ivf.entries)
+        print(f"{'nprobe':>6} {'recall@' + str(args.top_k):>10} {'ivf ms':>8} {'brute ms':>9} {'speedup':>8}")
+        for row in recall_report(ivf, brute, queries, top_k=args.top_k):
+            print(f"{row['nprobe']:>6} {row['recall']:>10.3f} {row['ivf_ms']:>8.2f} {row['brute_ms']:>9.2f} {row['speedup']:>7.1f}x")
@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds (Prometheus convention), 100 µs .. 30 s
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+# Optional metrics file for Streamlit, rewritten at most every METRICS_EXPORT_INTERVAL
+# seconds (.json for JSON, anything else Prometheus text, e.g. node_exporter's textfile dir)
+METRICS_EXPORT_PATH = os.getenv("METRICS_EXPORT_PATH", "")
+METRICS_EXPORT_INTERVAL = float(os.getenv("METRICS_EXPORT_INTERVAL", 15))
+
+trace_logger = logging.getLogger("leavebot.trace")
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (count, sum and per-bucket counts, in seconds)."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the buckets (linear within a bucket, as Prometheus histogram_quantile)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+class Metrics:
+    """
+    Process-wide stage latency histograms and counters, keyed by name and labels.
+    Updates take a lock, so Streamlit session threads (and sync workers) can share it.
+    """
+
+    def __init__(self, namespace: str = "leavebot", buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+
+    def observe(self, stage: str, seconds: float, **labels: Any) -> None:
+        key = (stage, _labels(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(self.buckets)
+            hist.observe(seconds)
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def to_json(self) -> Dict[str, Any]:
+        """Snapshot with count, total and estimated p50/p95/p99 (ms) per stage."""
+        with self._lock:
+            stages = [
+                {
+                    "stage": stage,
+                    "labels": dict(labels),
+                    "count": hist.count,
+                    "total_ms": hist.sum * 1000,
+                    "mean_ms": hist.sum / hist.count * 1000,
+                    "p50_ms": hist.quantile(0.5) * 1000,
+                    "p95_ms": hist.quantile(0.95) * 1000,
+                    "p99_ms": hist.quantile(0.99) * 1000,
+                }
+                for (stage, labels), hist in sorted(self.histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+        return {"stages": stages, "counters": counters}
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        family = f"{self.namespace}_stage_duration_seconds"
+        lines = [f"# HELP {family} Latency of request stages.", f"# TYPE {family} histogram"]
+
+        def fmt(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        with self._lock:
+            for (stage, labels), hist in sorted(self.histograms.items()):
+                base = (("stage", stage),) + labels
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), hist.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{family}_bucket{fmt(base, (('le', le),))} {cumulative}")
+                lines.append(f"{family}_sum{fmt(base)} {hist.sum!r}")
+                lines.append(f"{family}_count{fmt(base)} {hist.count}")
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                metric = f"{self.namespace}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{metric}{fmt(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """Write the current metrics to path atomically (.json -> JSON, else Prometheus text)."""
+        body = json.dumps(self.to_json(), indent=2) if path.endswith(".json") else self.to_prometheus()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+    def maybe_export(self, path: str = METRICS_EXPORT_PATH, interval: float = METRICS_EXPORT_INTERVAL) -> bool:
+        """Export to path if set and the last export is older than interval seconds."""
+        if not path:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_export < interval:
+                return False
+            self._last_export = now
+        self.export(path)
+        return True
+
+
+METRICS = Metrics()
+
+
+class Trace:
+    """One request: its fields (emp_id, intent, ...) and the duration of each span in it."""
+
+    __slots__ = ("name", "trace_id", "fields", "spans", "start")
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.fields = fields
+        self.spans: List[Tuple[str, float]] = []
+        self.start = time.perf_counter()
+
+    def record(self) -> Dict[str, Any]:
+        # A stage entered several times (e.g. one erp.request per leave type) is summed
+        spans_ms: Dict[str, float] = {}
+        for name, ms in self.spans:
+            spans_ms[name] = spans_ms.get(name, 0.0) + ms
+        return {
+            "event": self.name,
+            "trace_id": self.trace_id,
+            **self.fields,
+            "spans_ms": {name: round(ms, 3) for name, ms in spans_ms.items()},
+            "total_ms": round((time.perf_counter() - self.start) * 1000, 3),
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("leavebot_trace", default=None)
+
+
+class Span:
+    """Result of a span() block; ms is set when the block exits."""
+
+    __slots__ = ("stage", "ms")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.ms = 0.0
+
+
+@contextmanager
+def span(stage: str, metrics: Optional[Metrics] = None, **labels: Any) -> Iterator[Span]:
+    """
+    Time a block into the `stage` histogram (plus labels) and into the current trace.
+    Failed blocks are recorded too, labelled error=<exception type>.
+    """
+    result = Span(stage)
+    start = time.perf_counter()
+    try:
+        yield result
+    except BaseException as e:
+        labels["error"] = type(e).__name__
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        result.ms = elapsed * 1000
+        (metrics or METRICS).observe(stage, elapsed, **labels)
+        current = _current_trace.get()
+        if current is not None:
+            current.spans.append((stage, result.ms))
+
+
+@contextmanager
+def trace(name: str, metrics: Optional[Metrics] = None, **fields: Any) -> Iterator[Trace]:
+    """
+    Per-request trace: spans opened inside the block (in this thread or asyncio task)
+    are collected and logged as one JSON line on the leavebot.trace logger at exit.
+    Add fields during the request with annotate().
+    """
+    current = Trace(name, fields)
+    token = _current_trace.set(current)
+    try:
+        with span(name, metrics):
+            yield current
+    except BaseException as e:
+        current.fields["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_trace.reset(token)
+        trace_logger.info(json.dumps(current.record(), ensure_ascii=False, default=str))
+        (metrics or METRICS).maybe_export()
+
+
+def annotate(**fields: Any) -> None:
+    """Add fields to the current request's trace log line (no-op outside a trace)."""
+    current = _current_trace.get()
+    if current is not None:
+        current.fields.update(fields)
+
+
+# Script usage:
+#   python -m leavebot.core.metrics leavebot/data/metrics.json
+# Prints a metrics file written via METRICS_EXPORT_PATH as a per-stage latency table.
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize a JSON metrics export.")
+    parser.add_argument("path")
+    args = parser.parse_args()
+    with open(args.path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    print(f"{'stage':<28} {'labels':<30} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in data["stages"]:
+        labels = ",".join(f"{k}={v}" for k, v in row["labels"].items())
+        print(f"{row['stage']:<28} {labels[:30]:<30} {row['count']:>7} "
+              f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}")
+    for row in data["counters"]:
+        labels = ",".join(f"{k}={v}" for k, v in row["labels"].items())
+        print(f"{row['name']}{{{labels}}} {row['value']:g}")
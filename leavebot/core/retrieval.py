@@ -0,0 +1,112 @@
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+from leavebot.core.bm25 import BM25Index
+from leavebot.core.metrics import annotate, span
+from leavebot.core.search_embeddings import apply_threshold, top_k_indices
+
+RETRIEVAL_MODES = ("lexical", "dense", "hybrid")
+DEFAULT_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
+
+class HybridRetriever:
+    """
+    Doc knowledge retrieval pipeline with three modes:
+      lexical: BM25 over section/text only (no embedding call)
+      dense:   cosine similarity against every section (search_doc_knowledge behaviour)
+      hybrid:  BM25 shortlist, then cosine rerank of just the shortlist
+    Hybrid falls back to dense when BM25 matches fewer than top_k sections.
+    """
+
+    def __init__(
+        self,
+        dense_index,
+        lexical_index: Optional[BM25Index] = None,
+        mode: str = DEFAULT_MODE,
+        shortlist_size: int = 200,
+    ):
+        """
+        :param dense_index: DocKnowledgeIndex or IVFIndex (anything with matrix/entries/search)
+        :param lexical_index: BM25 index over the same entries; built from them if omitted
+        :param mode: One of RETRIEVAL_MODES
+        :param shortlist_size: BM25 candidates passed to the embedding rerank in hybrid mode
+        """
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}'. Use one of: {', '.join(RETRIEVAL_MODES)}")
+        self.dense_index = dense_index
+        self.lexical_index = lexical_index if lexical_index is not None else BM25Index.from_entries(dense_index.entries)
+        self.mode = mode
+        self.shortlist_size = shortlist_size
+
+    def retrieve(
+        self,
+        user_query: str,
+        embedding_fn: Callable[[str], Any],
+        top_k: int = 5,
+        mode: Optional[str] = None,
+    ) -> Tuple[List[Tuple[float, Dict[str, Any]]], Dict[str, float]]:
+        """
+        Return best-first (score, entry) pairs and per-stage timings in milliseconds.
+        Scores are cosine similarities, except in lexical mode where they are BM25 scores.
+        """
+        mode = mode or self.mode
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        entries = self.dense_index.entries
+        if not entries or top_k <= 0:
+            # Empty index (every source removed): nothing to embed or rank against
+            annotate(retrieval_mode=mode, top_scores=[])
+            return [], {"total_ms": (time.perf_counter() - start) * 1000}
+
+        shortlist: List[Tuple[float, int]] = []
+        if mode in ("lexical", "hybrid"):
+            with span("retrieval.lexical", mode=mode) as stage:
+                limit = top_k if mode == "lexical" else max(self.shortlist_size, top_k)
+                shortlist = self.lexical_index.search(user_query, limit)
+            timings["lexical_ms"] = stage.ms
+
+        if mode == "lexical":
+            scored = [(score, entries[i]) for score, i in shortlist]
+        else:
+            with span("retrieval.embed", mode=mode) as stage:
+                query = np.asarray(embedding_fn(user_query), dtype=np.float32)
+            timings["embed_ms"] = stage.ms
+
+            if mode == "hybrid" and len(shortlist) >= top_k:
+                with span("retrieval.rerank", mode=mode) as stage:
+                    rows = np.sort(np.fromiter((i for _, i in shortlist), dtype=np.int64))
+                    norm = np.linalg.norm(query)
+                    scores = self.dense_index.matrix[rows] @ (query / norm) if norm else np.zeros(rows.size, np.float32)
+                    top = top_k_indices(scores, top_k)
+                    scored = [(float(scores[j]), entries[rows[j]]) for j in top]
+                timings["rerank_ms"] = stage.ms
+            else:
+                with span("retrieval.dense", mode=mode) as stage:
+                    scored = self.dense_index.search(query, top_k)
+                timings["dense_ms"] = stage.ms
+
+        timings["total_ms"] = (time.perf_counter() - start) * 1000
+        annotate(retrieval_mode=mode, top_scores=[
+            {"score": round(score, 4), "section": entry.get("section")} for score, entry in scored[:top_k]
+        ])
+        return scored, timings
+
+    def search(
+        self,
+        user_query: str,
+        embedding_fn: Callable[[str], Any],
+        threshold: float = 0.50,
+        top_k: int = 5,
+        mode: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        """
+        Same result shape and threshold rule as search_doc_knowledge, plus stage timings.
+        The threshold applies to cosine scores only; lexical mode returns the top_k matches.
+        """
+        mode = mode or self.mode
+        scored, timings = self.retrieve(user_query, embedding_fn, top_k, mode)
+        if mode == "lexical":
+            return [{"score": score, **entry} for score, entry in scored], timings
+        return apply_threshold(scored, threshold, top_k), timings
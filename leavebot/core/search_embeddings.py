@@ -1,6 +1,7 @@
 import os
 import json
-from typing import List, Dict, Any
+import logging
+from typing import List, Dict, Any, Optional, Tuple, Union
 import numpy as np
 
 # Load environment variables for local development
@@ -12,12 +13,64 @@ except ImportError:
 
 import openai
 
-def get_query_embedding(query: str, model: str = "text-embedding-3-large") -> List[float]:
+from leavebot.core.embedding_cache import EmbeddingCache, get_default_cache, normalize_query
+from leavebot.core.metrics import METRICS, annotate, span, trace
+
+def get_query_embedding(
+    query: str,
+    model: str = "text-embedding-3-large",
+    cache: Optional[EmbeddingCache] = None,
+) -> List[float]:
+    # Repeated questions are answered from the LRU / SQLite cache without an API call
+    cache = cache if cache is not None else get_default_cache()
+    cached = cache.get(model, query)
+    METRICS.incr("embedding_cache_lookups", result="hit" if cached is not None else "miss")
+    if cached is not None:
+        return cached
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY not set in environment or .env file.")
-    response = openai.embeddings.create(input=[query], model=model)
-    return response.data[0].embedding
+    with span("embedding.openai", model=model):
+        response = openai.embeddings.create(input=[query], model=model)
+    embedding = response.data[0].embedding
+    cache.put(model, query, embedding)
+    return embedding
+
+def get_query_embeddings(
+    queries: List[str],
+    model: str = "text-embedding-3-large",
+    cache: Optional[EmbeddingCache] = None,
+    batch_size: int = 100,
+) -> List[List[float]]:
+    """
+    Embed many queries: cached ones are served locally, the rest are sent
+    in chunked embeddings.create(input=[...]) calls of at most batch_size texts.
+    """
+    cache = cache if cache is not None else get_default_cache()
+    embeddings: List[Optional[List[float]]] = [cache.get(model, q) for q in queries]
+    misses = sum(emb is None for emb in embeddings)
+    METRICS.incr("embedding_cache_lookups", len(queries) - misses, result="hit")
+    METRICS.incr("embedding_cache_lookups", misses, result="miss")
+    # Deduplicate misses by normalized text so each distinct question is embedded once
+    pending: Dict[str, List[int]] = {}
+    for i, emb in enumerate(embeddings):
+        if emb is None:
+            pending.setdefault(normalize_query(queries[i]), []).append(i)
+    if pending:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY not set in environment or .env file.")
+        keys = list(pending)
+        for start in range(0, len(keys), batch_size):
+            chunk = keys[start:start + batch_size]
+            texts = [queries[pending[k][0]] for k in chunk]
+            with span("embedding.openai", model=model):
+                response = openai.embeddings.create(input=texts, model=model)
+            for key, text, item in zip(chunk, texts, response.data):
+                cache.put(model, text, item.embedding)
+                for i in pending[key]:
+                    embeddings[i] = item.embedding
+    return embeddings
 
 def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
     norm1 = np.linalg.norm(vec1)
@@ -26,29 +79,121 @@ def cosine_similarity(vec1: np.ndarray, vec2: np.ndarray) -> float:
         return 0.0
     return float(np.dot(vec1, vec2) / (norm1 * norm2))
 
+class DocKnowledgeIndex:
+    """
+    Prebuilt search index over doc knowledge sections.
+    Holds one contiguous float32 matrix of L2-normalized section embeddings,
+    so a query is scored with a single matrix-vector product.
+    """
+
+    def __init__(self, matrix: np.ndarray, entries: List[Dict[str, Any]]):
+        """
+        :param matrix: (n_sections, dim) float32 matrix, rows already L2-normalized
+        :param entries: Section dicts aligned with the matrix rows
+        """
+        self.matrix = matrix
+        self.entries = entries
+
+    @classmethod
+    def from_entries(cls, doc_knowledge: List[Dict[str, Any]]) -> "DocKnowledgeIndex":
+        """
+        Build the index from doc knowledge entries (as stored in combined_doc_knowledge.json).
+        Entries without an embedding are skipped.
+        """
+        entries = [entry for entry in doc_knowledge if entry.get("embedding")]
+        if not entries:
+            return cls(np.zeros((0, 0), dtype=np.float32), [])
+        matrix = np.array([entry["embedding"] for entry in entries], dtype=np.float32)
+        return cls(normalize_rows(matrix), entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, query_emb: np.ndarray, top_k: int) -> List[Tuple[float, Dict[str, Any]]]:
+        """
+        Return the top_k (score, entry) pairs by cosine similarity, best first.
+        """
+        if not self.entries or top_k <= 0:
+            return []
+        query = np.asarray(query_emb, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            scores = np.zeros(len(self.entries), dtype=np.float32)
+        else:
+            scores = self.matrix @ (query / norm)
+        top = top_k_indices(scores, top_k)
+        return [(float(scores[i]), self.entries[i]) for i in top]
+
+    def search_batch(self, query_embs: np.ndarray, top_k: int) -> List[List[Tuple[float, Dict[str, Any]]]]:
+        """
+        Score many queries at once with one matrix-matrix product.
+        Returns one best-first list of (score, entry) pairs per query row.
+        """
+        queries = np.array(query_embs, dtype=np.float32, ndmin=2)
+        if not self.entries or top_k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+        scores = normalize_rows(queries) @ self.matrix.T
+        k = min(top_k, scores.shape[1])
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(k), scores.shape)
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        top = np.take_along_axis(candidates, order, axis=1)
+        top_scores = np.take_along_axis(candidate_scores, order, axis=1)
+        return [
+            [(float(score), self.entries[i]) for score, i in zip(row_scores, row)]
+            for row_scores, row in zip(top_scores, top)
+        ]
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize the rows of a matrix in place. Zero rows stay zero."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k highest scores, best first (partial selection, no full sort)."""
+    if top_k < scores.shape[0]:
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
 def search_doc_knowledge(
     user_query: str,
-    doc_knowledge: List[Dict[str, Any]],
+    doc_knowledge: Union[DocKnowledgeIndex, List[Dict[str, Any]]],
     embedding_fn=get_query_embedding,
     threshold: float = 0.50,  # Lowered to be practical
     top_k: int = 5
 ) -> List[Dict[str, Any]]:
-    user_emb = np.array(embedding_fn(user_query))
-    scored_sections = []
-    for entry in doc_knowledge:
-        doc_emb = np.array(entry.get("embedding", []))
-        if doc_emb.size == 0:
-            continue
-        score = cosine_similarity(user_emb, doc_emb)
-        scored_sections.append((score, entry))
-
-    scored_sections.sort(reverse=True, key=lambda x: x[0])
-
-    # Debug: print top similarity scores for transparency
-    print("\nTop 5 similarity scores:")
-    for idx, (score, entry) in enumerate(scored_sections[:5]):
-        print(f"{idx+1}. Score: {score:.4f}, Section: {entry.get('section')}")
+    # Accept a raw entry list for backward compatibility; prefer passing a prebuilt index
+    if isinstance(doc_knowledge, list):
+        doc_knowledge = DocKnowledgeIndex.from_entries(doc_knowledge)
+
+    with span("search.embed"):
+        user_emb = np.asarray(embedding_fn(user_query), dtype=np.float32)
+    with span("search.score"):
+        scored_sections = doc_knowledge.search(user_emb, max(top_k, 5))
+
+    # Top similarity scores go into the request's trace log line for transparency
+    annotate(top_scores=[
+        {"score": round(score, 4), "section": entry.get("section")} for score, entry in scored_sections[:5]
+    ])
+
+    return apply_threshold(scored_sections, threshold, top_k, verbose=True)
 
+def apply_threshold(
+    scored_sections: List[Tuple[float, Dict[str, Any]]],
+    threshold: float,
+    top_k: int,
+    verbose: bool = False,
+) -> List[Dict[str, Any]]:
     # Return only those above threshold
     filtered_results = [
         {"score": score, **entry}
@@ -57,28 +202,93 @@ def search_doc_knowledge(
     ]
     # If none above threshold, return top_k with a warning
     if not filtered_results and scored_sections:
-        print("\n[INFO] No results above threshold. Returning top matches anyway.\n")
+        if verbose:
+            logging.info("No results above threshold. Returning top matches anyway.")
+        annotate(below_threshold=True)
         filtered_results = [
             {"score": score, **entry}
             for score, entry in scored_sections[:top_k]
         ]
     return filtered_results
 
-if __name__ == "__main__":
-    user_question = input("Enter your question: ").strip()
-    doc_path = "leavebot/data/combined_doc_knowledge.json"
+def search_doc_knowledge_batch(
+    user_queries: List[str],
+    doc_knowledge: Union[DocKnowledgeIndex, List[Dict[str, Any]]],
+    embedding_fn=get_query_embeddings,
+    threshold: float = 0.50,
+    top_k: int = 5,
+    chunk_size: int = 256,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Batch version of search_doc_knowledge: one result list per question,
+    with the same threshold/top_k rules. embedding_fn takes a list of texts.
+    Questions are scored chunk_size at a time to bound the score matrix size.
+    """
+    if isinstance(doc_knowledge, list):
+        doc_knowledge = DocKnowledgeIndex.from_entries(doc_knowledge)
+    if not user_queries:
+        return []
+    query_embs = np.asarray(embedding_fn(user_queries), dtype=np.float32)
+    results = []
+    for start in range(0, len(user_queries), chunk_size):
+        for scored_sections in doc_knowledge.search_batch(query_embs[start:start + chunk_size], top_k):
+            results.append(apply_threshold(scored_sections, threshold, top_k))
+    return results
 
-    if not os.path.exists(doc_path):
-        raise FileNotFoundError(f"Doc knowledge file not found: {doc_path}")
+def run_batch(in_path: str, out_path: str, doc_knowledge, threshold: float = 0.50, top_k: int = 5) -> int:
+    """
+    Read questions from a JSONL file (one {"question": ...} object or JSON string per line),
+    write one {..., "results": [...]} line per question. Returns the number of questions.
+    """
+    records = []
+    with open(in_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            records.append(record if isinstance(record, dict) else {"question": record})
+    questions = [str(r.get("question", "")) for r in records]
+    all_results = search_doc_knowledge_batch(questions, doc_knowledge, threshold=threshold, top_k=top_k)
+    with open(out_path, "w", encoding="utf-8") as out_f:
+        for record, results in zip(records, all_results):
+            record["results"] = [
+                {k: v for k, v in result.items() if k != "embedding"}
+                for result in results
+            ]
+            out_f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return len(records)
 
-    with open(doc_path, "r", encoding="utf-8") as f:
-        doc_knowledge = json.load(f)
+if __name__ == "__main__":
+    import argparse
+    from leavebot.core.embedding_store import DEFAULT_JSON_PATH, load_doc_index
 
-    results = search_doc_knowledge(user_question, doc_knowledge, threshold=0.50, top_k=5)
+    parser = argparse.ArgumentParser(description="Search doc knowledge interactively or in batch.")
+    parser.add_argument("--batch", metavar="QUESTIONS_JSONL", help="Read questions from a JSONL file")
+    parser.add_argument("--out", metavar="RESULTS_JSONL", help="Where to write batch results")
+    parser.add_argument("--threshold", type=float, default=0.50)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+    if args.batch and not args.out:
+        parser.error("--batch requires --out")
 
-    if results:
-        for result in results:
-            print(f"\nMatched Section: {result.get('section', 'N/A')} (Score: {result['score']:.3f})\n")
-            print(result.get('text', 'No text found.'))
+    doc_knowledge = load_doc_index()
+    if doc_knowledge is None:
+        raise FileNotFoundError(f"Doc knowledge file not found: {DEFAULT_JSON_PATH}")
+
+    if args.batch:
+        count = run_batch(args.batch, args.out, doc_knowledge, args.threshold, args.top_k)
+        print(f"Wrote results for {count} questions to {args.out}")
     else:
-        print("\nNo relevant policy found. Try rephrasing your question or contact HR.")
+        # The trace line (stage timings and top-5 scores) is logged to stderr
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        user_question = input("Enter your question: ").strip()
+        with trace("search", query=user_question):
+            results = search_doc_knowledge(user_question, doc_knowledge, threshold=args.threshold, top_k=args.top_k)
+
+        if results:
+            for result in results:
+                print(f"\nMatched Section: {result.get('section', 'N/A')} (Score: {result['score']:.3f})\n")
+                print(result.get('text', 'No text found.'))
+        else:
+            print("\nNo relevant policy found. Try rephrasing your question or contact HR.")
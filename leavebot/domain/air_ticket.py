@@ -1,6 +1,8 @@
 # leavebot/domain/air_ticket.py
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+from leavebot.domain.leave_resolver import get_resolver
 
 class AirTicketEligibility:
     """
@@ -11,6 +13,7 @@ class AirTicketEligibility:
         self.leave_balances = leave_balances
         self.leave_types = leave_types
         self.code_to_desc = {lt["code"]: lt["desc"] for lt in leave_types}
+        self.resolver = get_resolver(leave_types)
 
     def eligible_leaves(self) -> List[Dict[str, Any]]:
         """
@@ -26,23 +29,20 @@ class AirTicketEligibility:
                 })
         return eligible
 
-    from typing import Tuple
+    def _resolve_code(self, leave_query: str) -> Optional[str]:
+        """Balance key as given (e.g. 'AL'), else the shared leave-type resolver."""
+        q = leave_query.strip().upper()
+        if q in self.leave_balances:
+            return q
+        return self.resolver.resolve(leave_query)
 
     def is_eligible(self, leave_query: str) -> Tuple[bool, str]:
         """
         Query by leave code (e.g., 'AL') or description.
         Returns (True/False, message).
         """
-        q = leave_query.strip().upper()
-        info = self.leave_balances.get(q)
-        if not info:
-            # Try match on description
-            q_lower = leave_query.strip().lower()
-            for code, desc in self.code_to_desc.items():
-                if q_lower in desc.lower():
-                    info = self.leave_balances.get(code)
-                    q = code
-                    break
+        q = self._resolve_code(leave_query)
+        info = self.leave_balances.get(q) if q else None
         if info and info.get("air_ticket"):
             return True, f"Eligible for air ticket on {self.code_to_desc.get(q, q)} ({info.get('air_ticket_percent', 0)}%)."
         elif info:
@@ -53,15 +53,8 @@ class AirTicketEligibility:
         """
         Return air ticket percent for the given leave (if eligible), else 0.
         """
-        q = leave_query.strip().upper()
-        info = self.leave_balances.get(q)
-        if not info:
-            # Try by description
-            q_lower = leave_query.strip().lower()
-            for code, desc in self.code_to_desc.items():
-                if q_lower in desc.lower():
-                    info = self.leave_balances.get(code)
-                    break
+        code = self._resolve_code(leave_query)
+        info = self.leave_balances.get(code) if code else None
         if info and info.get("air_ticket"):
             return info.get("air_ticket_percent", 0)
         return 0
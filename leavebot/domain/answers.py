@@ -0,0 +1,90 @@
+from datetime import date
+from typing import Any, Dict, Optional
+
+from leavebot.domain.employee_helpers import EmployeeHelpers
+
+# Bump when an answer's wording or content changes, so stored answers are re-rendered
+ANSWERS_VERSION = 1
+
+
+def _leave_balance_answer(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    balances = ctx["leave_balances"]
+    lines = [
+        f"{lt['desc']}: {balances[lt['code']]['balance']} days"
+        for lt in ctx["leave_types"]
+        if lt["code"] in balances and balances[lt["code"]]["balance"] > 0
+    ]
+    return {"title": "**Your leave balances:**", "text": "\n".join(lines)}
+
+
+def _air_ticket_answer(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    balances = ctx["leave_balances"]
+    tickets = [
+        f"{lt['desc']} ({lt['code']}): {balances[lt['code']]['air_ticket_percent']}%"
+        for lt in ctx["leave_types"]
+        if balances.get(lt["code"], {}).get("air_ticket")
+    ]
+    if not tickets:
+        return {"title": None, "text": "No leaves grant air ticket."}
+    return {"title": "**Leaves eligible for Air Ticket:**", "text": "\n".join(tickets)}
+
+
+def render_answers(ctx: Dict[str, Any], today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Render every canned answer for an employee context, keyed by intent name, plus
+    the profile summary. Answers are {"title": markdown or None, "text": str}.
+    Probation and years of service depend on the day, so the render date is stamped too.
+    """
+    emp = EmployeeHelpers(ctx["employee"])
+    answers = {
+        "leave_balance": _leave_balance_answer(ctx),
+        "air_ticket": _air_ticket_answer(ctx),
+        "manager": {"title": None, "text": f"Your manager: {emp.get_manager()}"},
+        "probation": {"title": None, "text": emp.is_on_probation()[1]},
+        "accommodation": {"title": None, "text": emp.is_eligible_for_accommodation()[1]},
+        "shift": {"title": None, "text": f"Your shift: {emp.get_shift()}"},
+        "rp_number": {"title": None, "text": f"Your RP Number: {emp.get_rp_number()}"},
+        "department": {"title": None, "text": f"Your department: {emp.get_department()}"},
+        "joining_date": {"title": None, "text": f"Your joining date: {emp.get_joining_date()}"},
+    }
+    return {
+        "version": ANSWERS_VERSION,
+        "rendered_on": (today or date.today()).isoformat(),
+        "answers": answers,
+        "summary": emp.get_summary(),
+    }
+
+
+def materialize_answers(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a mapped context with its rendered answers stored under "answers"."""
+    return {**ctx, "answers": render_answers(ctx)}
+
+
+def is_fresh(materialized: Optional[Dict[str, Any]], today: Optional[date] = None) -> bool:
+    return (
+        bool(materialized)
+        and materialized.get("version") == ANSWERS_VERSION
+        and materialized.get("rendered_on") == (today or date.today()).isoformat()
+    )
+
+
+def get_answers(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Materialized answers for a context: the stored ones when they match ANSWERS_VERSION
+    and today's date, otherwise rendered now (and kept on the in-memory context).
+    The stored context itself is rewritten with new answers whenever its data changes.
+    """
+    materialized = ctx.get("answers")
+    if not is_fresh(materialized):
+        materialized = render_answers(ctx)
+        ctx["answers"] = materialized
+    return materialized
+
+
+# Script usage: python -m leavebot.domain.answers
+if __name__ == "__main__":
+    import json
+
+    with open("leavebot/data/mapped_context.json", "r", encoding="utf-8") as f:
+        ctx = json.load(f)
+    print(json.dumps(render_answers(ctx), indent=2, ensure_ascii=False))
@@ -1,13 +1,15 @@
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 
+from leavebot.domain.records import Employee
+
 class EmployeeHelpers:
     """
     Utility class to provide standardized access to employee information.
-    Expects a pre-mapped employee dictionary (all keys normalized).
+    Expects a pre-mapped employee dictionary (all keys normalized) or an Employee record.
     """
 
-    def __init__(self, employee: Dict[str, Any]):
+    def __init__(self, employee: Union[Dict[str, Any], Employee]):
         self.emp = employee
 
     def get_full_name(self) -> str:
@@ -1,12 +1,20 @@
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Sequence
 from datetime import datetime
 
+from leavebot.domain.leave_resolver import get_resolver
+
 class LeaveHelpers:
-    def __init__(self, leave_balances: Dict[str, Any], leave_types: List[Dict[str, Any]]):
+    """
+    Leave questions over a mapped context. leave_balances / leave_types may be the
+    mapped dicts or LeaveBalance / LeaveType records (EmployeeContext fields).
+    """
+
+    def __init__(self, leave_balances: Dict[str, Any], leave_types: Sequence[Any]):
         self.leave_balances = leave_balances
         self.leave_types = {lt["code"]: lt for lt in leave_types}
         self.code_to_desc = {lt["code"]: lt["desc"] for lt in leave_types}
         self.desc_to_code = {lt["desc"].lower(): lt["code"] for lt in leave_types}
+        self.resolver = get_resolver(leave_types)
 
     def can_apply_for(self, leave_query: str) -> Tuple[bool, str]:
         """Check if user can apply for a leave type (by code or description)."""
@@ -134,16 +142,8 @@ class LeaveHelpers:
             return None, "You do not have sufficient balance in any leave type."
 
     def _resolve_code(self, leave_query: str) -> Optional[str]:
-        """Resolves leave code from code or description (case-insensitive, substring allowed)."""
-        q = leave_query.strip().upper()
-        if q in self.leave_types:
-            return q
-        # Try by description (case-insensitive, substring match)
-        q_lower = leave_query.strip().lower()
-        for code, desc in self.code_to_desc.items():
-            if q_lower in desc.lower():
-                return code
-        return None
+        """Resolves leave code from code or description (case-insensitive, substring or small typos allowed)."""
+        return self.resolver.resolve(leave_query)
 
 # --- Usage Example (for CLI/manual tests) ---
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+GRAM_SIZE = 3
+RESOLVE_CACHE_SIZE = 1024  # resolved queries remembered per resolver
+# Words shared by most descriptions; they never earn typo budget on their own
+GENERIC_WORDS = frozenset({"leave"})
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _grams(text: str, n: int) -> Set[str]:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def substring_distance(query: str, text: str, max_dist: int) -> int:
+    """
+    Smallest edit distance between query and any substring of text (Sellers'
+    approximate substring match), or max_dist + 1 once every alignment exceeds max_dist.
+    """
+    prev = [0] * (len(text) + 1)  # a match may start anywhere in text
+    for i, qc in enumerate(query, 1):
+        cur = [i] + [0] * len(text)
+        for j, tc in enumerate(text, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (qc != tc))
+        if min(cur) > max_dist:
+            return max_dist + 1
+        prev = cur
+    return min(prev)
+
+
+class LeaveTypeResolver:
+    """
+    Resolves a user's leave query ("AL", "annual leave", "sick", "anual leave") to a
+    leave code. Built once per set of leave types; lookups try in order:
+      1. exact code (case-insensitive)
+      2. exact description (case and whitespace-insensitive)
+      3. description substring, via an n-gram index (first leave type in policy order wins)
+      4. bounded edit distance to a description substring, for typos. The budget comes
+         from the distinctive words of the query (not "leave"), and each of those words
+         must itself match within its own budget, so "xyz leave" or "half day" stay unresolved
+    """
+
+    def __init__(self, code_to_desc: Dict[str, str], max_typos: int = 2):
+        """
+        :param code_to_desc: Leave code -> description, in policy order
+        :param max_typos: Edit distance allowed for words of 8+ characters (1 for 4-7, none below)
+        """
+        self.codes: List[str] = list(code_to_desc)
+        self.descs: List[str] = [_normalize(code_to_desc[c] or "") for c in self.codes]
+        self.max_typos = max_typos
+        self.by_code: Dict[str, str] = {}
+        self.by_desc: Dict[str, str] = {}
+        for code, desc in zip(self.codes, self.descs):
+            self.by_code.setdefault(str(code).strip().upper(), code)
+            self.by_desc.setdefault(desc, code)
+        # Postings for every 1..GRAM_SIZE-gram of each description (row numbers)
+        self.postings: Dict[str, Set[int]] = {}
+        for row, desc in enumerate(self.descs):
+            for n in range(1, GRAM_SIZE + 1):
+                for gram in _grams(desc, n):
+                    self.postings.setdefault(gram, set()).add(row)
+        self.resolve = lru_cache(maxsize=RESOLVE_CACHE_SIZE)(self._resolve)
+
+    def _candidates(self, query: str) -> Set[int]:
+        """Rows whose description contains every n-gram of the query."""
+        grams = _grams(query, GRAM_SIZE) if len(query) >= GRAM_SIZE else {query}
+        rows: Optional[Set[int]] = None
+        for gram in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+            rows = set(self.postings.get(gram, ())) if rows is None else rows & self.postings.get(gram, set())
+            if not rows:
+                return set()
+        return rows or set()
+
+    def _typo_budget(self, word: str) -> int:
+        if len(word) < 4:
+            return 0
+        return 1 if len(word) < 8 else self.max_typos
+
+    def _words_match(self, words: List[Tuple[str, int]], desc: str) -> bool:
+        return all(substring_distance(word, desc, budget) <= budget for word, budget in words)
+
+    def _resolve(self, leave_query: str) -> Optional[str]:
+        code = self.by_code.get(leave_query.strip().upper())
+        if code is not None:
+            return code
+        q = _normalize(leave_query)
+        if not q:
+            return None
+        code = self.by_desc.get(q)
+        if code is not None:
+            return code
+
+        rows = [row for row in sorted(self._candidates(q)) if q in self.descs[row]]
+        if rows:
+            return self.codes[rows[0]]
+
+        words = [(word, self._typo_budget(word)) for word in q.split() if word not in GENERIC_WORDS]
+        budget = min(sum(b for _, b in words), self.max_typos)
+        if not budget:
+            return None
+        best: Tuple[int, int] = (budget + 1, len(self.codes))
+        for row, desc in enumerate(self.descs):
+            dist = substring_distance(q, desc, min(budget, best[0]))
+            if (dist, row) < best and self._words_match(words, desc):
+                best = (dist, row)
+        return self.codes[best[1]] if best[0] <= budget else None
+
+
+@lru_cache(maxsize=256)
+def _resolver_for(pairs: Tuple[Tuple[str, str], ...]) -> LeaveTypeResolver:
+    return LeaveTypeResolver(dict(pairs))
+
+
+def get_resolver(leave_types: Iterable[Dict[str, str]]) -> LeaveTypeResolver:
+    """
+    Shared resolver for a leave-type list. Employees on the same leave policy have
+    the same codes and descriptions, so they get the same resolver and its cache.
+    """
+    return _resolver_for(tuple((lt["code"], lt["desc"]) for lt in leave_types))
+
+
+# Script usage: python -m leavebot.domain.leave_resolver "anual leave" sick CL
+if __name__ == "__main__":
+    import sys
+    import json
+
+    with open("leavebot/data/mapped_context.json", "r", encoding="utf-8") as f:
+        ctx = json.load(f)
+    resolver = get_resolver(ctx["leave_types"])
+    for query in sys.argv[1:] or [
+        "AL", "annual leave", "anual leave", "sick", "casual", "hajj", "umra", "emergncy",
+        "xyz leave", "half day",  # no distinctive word matches: both resolve to None
+    ]:
+        print(f"{query!r} -> {resolver.resolve(query)}")
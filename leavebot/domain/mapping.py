@@ -1,10 +1,17 @@
 import json
-from typing import Any, Dict, List
-def map_employee(employee_raw):
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from leavebot.domain.records import Employee, EmployeeContext, LeaveBalance, LeaveType
+
+# Bump when the mapping output changes, so delta syncs remap unchanged ERP payloads
+MAPPING_VERSION = 1
+
+def map_employee(employee_raw, as_record: bool = False):
     if not employee_raw or not isinstance(employee_raw, list):
-        return {}
+        return Employee() if as_record else {}
     emp = employee_raw[0]
-    return {
+    mapped = {
         "emp_id": emp.get("Emp_ID_N"),
         "name": emp.get("Emp_EFullName_V", "") or emp.get("Emp_EDisplayName_V", ""),
         "code": emp.get("Emp_Code_V", ""),
@@ -40,11 +47,13 @@ def map_employee(employee_raw):
         ),
         "reporting_to": emp.get("Emp_EmployeeReportsDesc_V"),
     }
+    return Employee(**mapped) if as_record else mapped
 
 
-def map_leave_types(leave_types_raw: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def map_leave_types(leave_types_raw: List[Dict[str, Any]], as_record: bool = False) -> List[Any]:
     """
-    Map raw leave types list to a clean list of dicts with relevant fields.
+    Map raw leave types list to a clean list of dicts with relevant fields
+    (LeaveType records if as_record).
     """
     mapped = []
     for lt in leave_types_raw:
@@ -58,14 +67,18 @@ def map_leave_types(leave_types_raw: List[Dict[str, Any]]) -> List[Dict[str, Any
             "atm_id": lt.get("Atm_ID_N"),
             "eligibility_on_workdays": str(lt.get("Lpd_EligibilityOnWrkdays_N", "0")) == "1",
         })
+    if as_record:
+        return [LeaveType(**item) for item in mapped]
     return mapped
 
 def map_leave_balances(
     leave_balances_raw: Dict[str, Any],
     leave_types_raw: List[Dict[str, Any]],
-) -> Dict[str, Dict[str, Any]]:
+    as_record: bool = False,
+) -> Dict[str, Any]:
     """
-    Map raw leave balances dict to normalized dict keyed by leave code.
+    Map raw leave balances dict to normalized dict keyed by leave code
+    (LeaveBalance records if as_record).
     Uses leave_types_raw to link code and description to balances.
     """
     id_to_code = {str(lt.get("Lpd_ID_N")): lt.get("Lvm_Code_V") for lt in leave_types_raw}
@@ -89,23 +102,146 @@ def map_leave_balances(
             "air_ticket_percent": float(item.get("AirTicketPercent", 0)),
             # Add more fields if required for business rules.
         }
+        if as_record:
+            mapped[code] = LeaveBalance(**mapped[code])
     return mapped
 
-def build_full_context(api_data: Dict[str, Any]) -> Dict[str, Any]:
+def build_full_context(api_data: Dict[str, Any], as_record: bool = False) -> Union[Dict[str, Any], EmployeeContext]:
     """
     Take raw API output and map it to the full clean context for downstream use.
+    With as_record, returns a compact EmployeeContext (to_dict() gives the dict form).
     """
-    employee = map_employee(api_data["employee"])
-    leave_types = map_leave_types(api_data["leave_types"])
-    leave_balances = map_leave_balances(api_data["leave_balances"], api_data["leave_types"])
+    employee = map_employee(api_data["employee"], as_record)
+    leave_types = map_leave_types(api_data["leave_types"], as_record)
+    leave_balances = map_leave_balances(api_data["leave_balances"], api_data["leave_types"], as_record)
+    if as_record:
+        return EmployeeContext(employee, tuple(leave_types), leave_balances)
     return {
         "employee": employee,
         "leave_types": leave_types,
         "leave_balances": leave_balances,  # Keyed by leave code, e.g. 'AL'
     }
 
+def iter_raw_records(path: str, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """
+    Stream raw ERP records (fetch_all_data output) from a dump without loading it whole.
+    Accepts JSONL (one record per line), a JSON array of records or a single record;
+    arrays are decoded object by object from chunk_size reads.
+    """
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+        while True:
+            # Skip whitespace and array punctuation between records
+            while pos < len(buf) and buf[pos] in " \t\r\n,[]":
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    return
+                buf, pos = f.read(chunk_size), 0
+                eof = not buf
+                continue
+            try:
+                record, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Record continues past the buffer: keep the tail and read more
+                more = f.read(chunk_size)
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield record
+            pos = end
+
+
+def map_records(records: Iterable[Dict[str, Any]], stats: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Generator stage: build_full_context for each raw record, one at a time.
+    Records without employee details or that fail to map are logged and skipped.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("read", 0)
+    stats.setdefault("mapped", 0)
+    stats.setdefault("skipped", 0)
+    for record in records:
+        stats["read"] += 1
+        try:
+            ctx = build_full_context(record)
+        except Exception as e:
+            logging.error(f"Skipping record {stats['read']}: {e}")
+            stats["skipped"] += 1
+            continue
+        if ctx["employee"].get("emp_id") is None:
+            logging.error(f"Skipping record {stats['read']}: no employee details")
+            stats["skipped"] += 1
+            continue
+        stats["mapped"] += 1
+        yield ctx
+
+
+def stream_map_to_store(
+    in_path: str,
+    store=None,
+    batch_size: int = 1000,
+    out_path: Optional[str] = None,
+    materialize: bool = True,
+) -> Dict[str, int]:
+    """
+    Map a raw ERP dump record by record into the context store, committing every
+    batch_size contexts (with rendered answers if materialize). Optionally also
+    writes the mapped contexts as JSONL.
+    Memory use depends on batch_size, not on the size of the dump.
+    """
+    from leavebot.core.context_store import ContextStore
+    from leavebot.domain.answers import materialize_answers
+
+    store = store if store is not None else ContextStore()
+    stats: Dict[str, int] = {}
+    contexts = map_records(iter_raw_records(in_path), stats)
+    if materialize:
+        contexts = (materialize_answers(ctx) for ctx in contexts)
+    if out_path:
+        out_f = open(out_path, "w", encoding="utf-8")
+
+        def tee(items):
+            for ctx in items:
+                out_f.write(json.dumps(ctx, ensure_ascii=False) + "\n")
+                yield ctx
+
+        contexts = tee(contexts)
+    try:
+        stats["written"] = store.upsert_many(contexts, batch_size=batch_size)
+    finally:
+        if out_path:
+            out_f.close()
+    return stats
+
 # Script usage example: reads API output and writes mapped context for further processing
+#   python -m leavebot.domain.mapping
+#   python -m leavebot.domain.mapping --stream roster_dump.jsonl [--out mapped.jsonl] [--batch-size 1000]
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Map raw ERP output to employee contexts.")
+    parser.add_argument("--stream", help="Raw ERP dump (JSONL or JSON array) to map record by record into the context store")
+    parser.add_argument("--out", help="With --stream: also write mapped contexts to this JSONL file")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Contexts per store commit")
+    parser.add_argument("--no-answers", action="store_true", help="Do not store pre-rendered answers with the contexts")
+    args = parser.parse_args()
+
+    if args.stream:
+        stats = stream_map_to_store(args.stream, batch_size=args.batch_size, out_path=args.out, materialize=not args.no_answers)
+        print(f"Mapped {stats['mapped']} of {stats['read']} records ({stats['skipped']} skipped) into the context store")
+        raise SystemExit(0)
+
     with open("leavebot/data/api_output.json", "r", encoding="utf-8") as f:
         api_data = json.load(f)
     mapped = build_full_context(api_data)
@@ -113,4 +249,10 @@ if __name__ == "__main__":
     with open("leavebot/data/mapped_context.json", "w", encoding="utf-8") as out_f:
         json.dump(mapped, out_f, indent=2, ensure_ascii=False)
     print("Saved mapped context to leavebot/data/mapped_context.json")
+    # Also upsert into the per-employee context store read by the app
+    from leavebot.core.context_store import ContextStore
+    from leavebot.domain.answers import materialize_answers
+    store = ContextStore()
+    store.put(mapped if args.no_answers else materialize_answers(mapped))
+    print(f"Stored context for emp_id={mapped['employee'].get('emp_id')} in {store.path}")
     print(json.dumps(mapped, indent=2))
@@ -0,0 +1,212 @@
+from dataclasses import FrozenInstanceError, dataclass, field, fields
+from typing import Any, Dict, Optional, Tuple
+
+
+class _Record:
+    """
+    Read access shared by the record types: record["code"] and record.get("code", default)
+    work like on the mapped dicts, so helpers accept either form.
+    get() also returns the default for fields that are None (missing in older contexts).
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__dataclass_fields__
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build a record from a mapped dict; unknown keys are ignored, missing ones default."""
+        names = cls.__dataclass_fields__
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+    # Frozen and without __dict__: pickle and copy go through these
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__dataclass_fields__)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for name, value in zip(self.__dataclass_fields__, state):
+            object.__setattr__(self, name, value)
+
+
+def _frozen_setattr(self, name: str, value: Any) -> None:
+    raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+
+def _frozen_delattr(self, name: str) -> None:
+    raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+
+def _slotted(cls):
+    """
+    Rebuild a dataclass with __slots__ for its fields (dataclass(slots=True) needs
+    Python 3.10; this keeps 3.8 supported). Apply on top of @dataclass.
+    """
+    names = tuple(f.name for f in fields(cls))
+    body = {k: v for k, v in cls.__dict__.items() if k not in names and k not in ("__dict__", "__weakref__")}
+    body["__slots__"] = names
+    # The generated frozen __setattr__/__delattr__ refer to the original class
+    body["__setattr__"] = _frozen_setattr
+    body["__delattr__"] = _frozen_delattr
+    slotted = type(cls)(cls.__name__, cls.__bases__, body)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+
+@_slotted
+@dataclass(frozen=True)
+class Employee(_Record):
+    """Mapped employee (map_employee output)."""
+
+    emp_id: Optional[int] = None
+    name: Optional[str] = None
+    code: Optional[str] = None
+    nationality: Optional[str] = None
+    gender: Optional[str] = None
+    marital_status: Optional[str] = None
+    visa_type: Optional[str] = None
+    visa_number: Optional[str] = None
+    doj: Optional[str] = None
+    job_title: Optional[str] = None
+    department: Optional[str] = None
+    sponsor: Optional[str] = None
+    contract_type: Optional[str] = None
+    pay_type: Optional[str] = None
+    nationality_code: Optional[str] = None
+    employee_type: Optional[str] = None
+    family_status: Optional[str] = None
+    mobile: Optional[str] = None
+    email: Optional[str] = None
+    rp_number: Optional[str] = None
+    rp_expiry: Optional[str] = None
+    manager_id: Optional[str] = None
+    manager_name: Optional[str] = None
+    leave_policy: Optional[str] = None
+    shift_name: Optional[str] = None
+    shift_code: Optional[str] = None
+    probation_end: Optional[str] = None
+    confirmed_date: Optional[str] = None
+    accommodation_eligible: bool = False
+    reporting_to: Optional[str] = None
+
+
+@_slotted
+@dataclass(frozen=True)
+class LeaveType(_Record):
+    """One leave type of the employee's policy (map_leave_types item)."""
+
+    id: Optional[int] = None
+    code: Optional[str] = None
+    desc: Optional[str] = None
+    attach_required: bool = False
+    self_service: bool = False
+    anniv_date: Optional[str] = None
+    atm_id: Optional[str] = None
+    eligibility_on_workdays: bool = False
+
+
+@_slotted
+@dataclass(frozen=True)
+class LeaveBalance(_Record):
+    """Balance of one leave type (map_leave_balances value)."""
+
+    id: Optional[int] = None
+    balance: float = 0.0
+    eligible: float = 0.0
+    paid: float = 0.0
+    unpaid: float = 0.0
+    days_allowed: int = 0
+    air_ticket: bool = False
+    max_days: int = 0
+    allow_half_day: bool = False
+    anniv_date: Optional[str] = None
+    air_ticket_percent: float = 0.0
+
+
+@_slotted
+@dataclass(frozen=True)
+class EmployeeContext(_Record):
+    """
+    Typed form of build_full_context output. leave_balances is keyed by leave code.
+    to_dict() returns the same JSON-ready shape as the dict mapping.
+    """
+
+    employee: Employee = field(default_factory=Employee)
+    leave_types: Tuple[LeaveType, ...] = ()
+    leave_balances: Dict[str, LeaveBalance] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "employee": self.employee.to_dict(),
+            "leave_types": [lt.to_dict() for lt in self.leave_types],
+            "leave_balances": {code: bal.to_dict() for code, bal in self.leave_balances.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EmployeeContext":
+        return cls(
+            employee=Employee.from_dict(data.get("employee") or {}),
+            leave_types=tuple(LeaveType.from_dict(lt) for lt in data.get("leave_types") or []),
+            leave_balances={code: LeaveBalance.from_dict(b) for code, b in (data.get("leave_balances") or {}).items()},
+        )
+
+
+def memory_comparison(n_employees: int = 50_000) -> Dict[str, float]:
+    """
+    Traced memory (MB) of a synthetic roster kept as mapped dicts vs as records.
+    Every employee is the sample api_output.json with its own emp_id and balances.
+    """
+    import copy
+    import gc
+    import json
+    import tracemalloc
+    from leavebot.domain.mapping import build_full_context
+
+    with open("leavebot/data/api_output.json", "r", encoding="utf-8") as f:
+        base = json.load(f)
+
+    def raw_records():
+        for i in range(n_employees):
+            raw = copy.copy(base)
+            raw["employee"] = [dict(base["employee"][0], Emp_ID_N=i)]
+            raw["leave_balances"] = {
+                k: [dict(rows[0], Balance=(i + int(k)) % 90)] if rows else rows
+                for k, rows in base["leave_balances"].items()
+            }
+            yield raw
+
+    result = {"employees": n_employees}
+    for label, as_record in (("dicts_mb", False), ("records_mb", True)):
+        gc.collect()
+        tracemalloc.start()
+        roster = [build_full_context(raw, as_record=as_record) for raw in raw_records()]
+        gc.collect()
+        result[label] = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+        del roster
+    return result
+
+
+# Script usage: python -m leavebot.domain.records [n_employees]
+if __name__ == "__main__":
+    import sys
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    report = memory_comparison(n)
+    print(
+        f"{report['employees']} employees: dicts {report['dicts_mb']:.1f} MB, "
+        f"records {report['records_mb']:.1f} MB ({report['records_mb'] / report['dicts_mb']:.0%})"
+    )
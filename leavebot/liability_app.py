@@ -0,0 +1,49 @@
+import streamlit as st
+import os
+import sys
+
+# Allow running this script directly by ensuring the package root is on sys.path
+if __name__ == "__main__" and os.path.basename(os.getcwd()) != "leavebot":
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leavebot.analytics.liability import GROUP_FIELDS, LeaveLiability
+from leavebot.core.context_store import ContextStore
+
+# HR/finance view of company-wide leave liability:
+#   streamlit run leavebot/liability_app.py
+# Keep it off the employee-facing deployment; it shows every employee's balances.
+
+@st.cache_resource(show_spinner=False)
+def get_context_store():
+    return ContextStore()
+
+@st.cache_resource(show_spinner="Packing leave balances...", max_entries=2)
+def load_liability(store_version):
+    # Rebuilt only when a sync or import changes the store version
+    return LeaveLiability.from_store(get_context_store())
+
+st.set_page_config(page_title="LeaveBot - Leave liability", layout="wide")
+st.title("Leave liability")
+
+liability = load_liability(get_context_store().version())
+st.caption(f"{len(liability)} employees, {len(liability.leave_codes)} leave codes")
+
+by = st.selectbox("Group by", list(GROUP_FIELDS))
+code = st.selectbox(
+    "Leave code", liability.leave_codes,
+    index=liability.leave_codes.index("AL") if "AL" in liability.leave_codes else 0,
+) if liability.leave_codes else None
+
+if code:
+    st.subheader(f"Outstanding {code} days by {by}")
+    st.dataframe(liability.outstanding(code, by))
+
+st.subheader(f"Air-ticket exposure by {by}")
+st.dataframe(liability.air_ticket_exposure(by))
+
+st.subheader("Balances over max days")
+st.dataframe(liability.over_max_days())
+
+with st.expander("Per leave code"):
+    st.dataframe(liability.code_summary())